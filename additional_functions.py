@@ -21,13 +21,20 @@
 
 from decimal import Decimal as dec
 import os
+import numpy as np
+
+# Files larger than this (in bytes) are memory-mapped, see choose_storage().
+LARGE_FILE_SIZE = 500 * 1024**2
 
 # ATTENTION: To many parameters can be wrong or non-existing. Thus I simply
 # assume that everything is alright.
 # Dear user, if you want to, you can easily crash the program.
 # < data > is a class Data object. 
+# For 'array'- and 'memmap'-storage the float values are written like the
+# dec()-numbers were before, see format_float().
 def write_to_file(outfile, data, order_of_variables):
 	length = len(getattr(data, order_of_variables[0]))
+	as_decimal = getattr(data, 'storage', 'decimal') != 'decimal'
 
 	with open(outfile, 'w', encoding='utf8') as f:
 		f.write(data.table_header)
@@ -36,6 +43,12 @@ def write_to_file(outfile, data, order_of_variables):
 			this = ''
 			for variable in order_of_variables:
 				value = getattr(data, variable)[i]
+				# Values that could not be calculated are nan-values in the 
+				# program and are written as "-" to the file.
+				if isinstance(value, float) and np.isnan(value):
+					value = '-'
+				elif as_decimal and isinstance(value, float):
+					value = format_float(value)
 				this = '{}\t{}'.format(this, value)
 
 			# Strip the trailing tab at the beginning and add a linebreak.
@@ -43,6 +56,32 @@ def write_to_file(outfile, data, order_of_variables):
 			f.write(this)
 
 
+
+# str() of a float gives '1.0' for whole numbers and exponents for small 
+# values (e.g. '6.390717350214516e-05'), while the files always contained
+# '1' and '0.00006390717350214516'. This writes floats the same way.
+# However, floats have just about 16 significant digits (dec()-numbers 28),
+# thus e.g. 72.6917 + 273.15 becomes 345.84169999999995. Hence, at most 15 
+# significant digits are written, which removes this noise (the example 
+# above becomes '0.0000639071735021452').
+# ATTENTION: trailing zeros of the original text (e.g. '0.01926110') are not
+# known anymore after parsing and are not written.
+def format_float(value):
+	return np.format_float_positional(value, precision = 15, unique = True, \
+											fractional = False, trim = '-')
+
+
+
+# Large files (e.g. a 24 h isothermal with a 0.1 s timestep) shall not be 
+# kept several times in the memory. These are read as memory-mapped data, all 
+# other files as regular arrays. See class Data() for the storage-types.
+def choose_storage(infile):
+	if os.path.getsize(infile) > LARGE_FILE_SIZE:
+		return 'memmap'
+	else:
+		return 'array'
+
+
  
 # To make the main()-functions of the programs more tidy.
 # This function checks if a folder actually exists.
@@ -205,17 +244,130 @@ def get_user_input(text, allow_blank = False, this_type = 'float'):
 
 		return int(user_input)
 
-	elif text == 'prediction_mode':
-		this = 'What shall be predicted? Isothermal (I) or linear '
-		that = 'temperature ramp (R)? '
-		text = this + that
+	elif text == 'interpolation':
+		this = 'Shall time and temperature be interpolated to the exact '
+		that = 'conversion steps? No, use the first data point after each step '
+		siht = '(N), linear (L) or monotone cubic (C, good for coarse data): '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['n', 'l', 'c']):
+			user_input = input(this + that + siht)
+
+		if user_input.lower() == 'l':
+			return 'linear'
+		elif user_input.lower() == 'c':
+			return 'pchip'
+		else:
+			return None
+
+	elif text == 'solver':
+		this = 'How shall the activation energy be searched for? Starting from '
+		that = 'an initial guess (G) or between 1 and 500 kJ/mol (B = bounded, '
+		siht = 'usually more reliable) or the same for all steps at once (A = '
+		taht = 'all, fastest for small conversion increments): '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['g', 'b', 'a']):
+			user_input = input(this + that + siht + taht)
+
+		if user_input.lower() == 'b':
+			return 'bounded'
+		elif user_input.lower() == 'a':
+			return 'batched'
+		else:
+			return 'bfgs'
+
+	elif text == 'continuation':
+		this = 'Start each conversion step from the results of the previous '
+		that = 'steps (Y = Yes, the steps are then calculated one after the '
+		siht = 'other, N = No, always start from the initial guess): '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['y', 'n', 'yes', 'no']):
+			user_input = input(this + that + siht)
+
+		if user_input.lower() == 'y' or user_input.lower() == 'yes':
+			return True
+		else:
+			return False
+
+	elif text == 'workers':
+		this = 'Number of processes which shall calculate in parallel (leave '
+		that = 'EMPTY to use just one): '
+
+		user_input = None
+		while not correct_user_input(user_input, 'int'):
+			user_input = input(this + that)
+			if user_input == '':
+				return 1
+
+		return max(int(user_input), 1)
+
+	elif text == 'prediction_batch':
+		this = 'Predict one isothermal or ramp (O) or many scenarios from a '
+		that = 'table (M)? '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['o', 'm']):
+			user_input = input(this + that)
+
+		if user_input.lower() == 'm':
+			return True
+		else:
+			return False
+
+	elif text == 'combined_file':
+		this = 'Write all scenarios into one file (Y) or each into its own '
+		that = 'file (N)? '
 
 		user_input = 'risimif'
-		while not correct_user_input(user_input, ['i', 'r']):
+		while not correct_user_input(user_input, ['y', 'n', 'yes', 'no']):
+			user_input = input(this + that)
+
+		if user_input.lower() == 'y' or user_input.lower() == 'yes':
+			return True
+		else:
+			return False
+
+	elif text == 'keep_every':
+		this = 'Write just every n-th timestep into the file, n = (leave EMPTY '
+		that = 'to write every timestep): '
+
+		user_input = None
+		while not correct_user_input(user_input, 'int'):
 			user_input = input(this + that)
+			if user_input == '':
+				return 1
+
+		return max(int(user_input), 1)
+
+	elif text == 'prediction_engine':
+		this = 'Calculate with the given timestep (T) or with adaptive timesteps '
+		that = 'and write out every timestep (A, like a very small timestep; fewer '
+		siht = 'steps for long predictions): '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['t', 'a']):
+			user_input = input(this + that + siht)
+
+		if user_input.lower() == 'a':
+			return 'ode'
+		else:
+			return 'euler'
+
+	elif text == 'prediction_mode':
+		this = 'What shall be predicted? Isothermal (I), linear '
+		that = 'temperature ramp (R) or a temperature program of several '
+		siht = 'ramps and holds (P)? '
+
+		user_input = 'risimif'
+		while not correct_user_input(user_input, ['i', 'r', 'p']):
+			user_input = input(this + that + siht)
 
 		if user_input.lower() == 'i':
 			return True
+		elif user_input.lower() == 'p':
+			return 'program'
 		else:
 			return False
 
@@ -35,9 +35,37 @@ import class_definitions as cd
 from decimal import Decimal as dec
 from copy import deepcopy
 import os
-from scipy.optimize import minimize
+from scipy.optimize import minimize, minimize_scalar
 import scipy.integrate as integrate
+import scipy.special as special
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# The gas constant in J/(mol*K).
+R = 8.314
+
+# Below this temperature change within one step (relative to the temperature) 
+# a step is treated as isothermal, see closed_form_integrals().
+MINIMUM_RELATIVE_RAMP = 1e-4
+
+# Nodes and weights for the Gauss-Legendre quadrature in closed_form_integrals().
+GAUSS_NODES, GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(5)
+
+# The interval in J/mol in which the activation energy is searched for if the
+# bounded solver is used, see outcome_for_one_value(). Activation energies of 
+# chemical reactions are well within these limits.
+ACTIVATION_ENERGY_BOUNDS = (1e3, 5e5)
+
+# The golden ratio section search in batched_outcomes() stops when the 
+# activation energies of all steps are known to this precision in J/mol. This
+# is the same as for the bounded solver.
+BATCHED_TOLERANCE = 1e-5
+
+# minimize() works with the activation energy in kJ/mol. In J/mol the 
+# derivative of the double sum is so small (1e-5 to 1e-7) that minimize() 
+# often stops right where it starts, see outcome_for_one_value().
+ENERGY_SCALE = 1e3
 
 ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## 
 ## ## ## ## ## ## ##                            ## ## ## ## ## ## ## 
@@ -63,36 +91,61 @@ def find_smallest_conversion(all_data):
 
 
 
+# The time and temperature values of the integral limits of all experiments 
+# as 2-D arrays (experiments x steps). Just the first < number_of_steps >
+# steps are of interest, see calculate_activation_energy().
+# ATTENTION: numpy can NOT work with decimal.Decimal(). Thus I convert 
+# everything to float here, once.
+def create_step_arrays(all_data, number_of_steps):
+	time_steps = []
+	temperature_steps = []
+	for data in all_data:
+		time_steps.append([float(x) for x in data.time_steps[:number_of_steps]])
+		temperature_steps.append([float(x) for x in data.temperature_steps[:number_of_steps]])
+
+	return np.array(time_steps), np.array(temperature_steps)
+
+
+
 # This function calculates all integrals for a given conversion which are 
 # needed to calculate the isoconversional double sum.
 # < this_index > is the UPPER integral limit!
-# ATTENTION: numpy can NOT work with decimal.Decimal(). Thus I convert 
-# everything back :(
-def all_integrals(E, all_data, this_index):
-	these_integrals = []
+# < engine > is 'closed_form' (default) or 'quad'. The latter is how it was 
+# done originally, integrating each experiment with .quad(). It is much
+# slower and kept to be able to check the results of the former.
+def all_integrals(E, time_steps, temperature_steps, this_index, engine = 'closed_form'):
+	# minimize() hands over E as an array with one element.
+	E = float(np.squeeze(E))
+
+	# Get the limits ...
+	lower_time = time_steps[:, this_index - 1]
+	upper_time = time_steps[:, this_index]
+	lower_temperature = temperature_steps[:, this_index - 1]
+	upper_temperature = temperature_steps[:, this_index]
+
+	if engine == 'closed_form':
+		return closed_form_integrals(E, lower_time, upper_time, \
+											lower_temperature, upper_temperature)
 
-	for data in all_data:
-		# Get the limits ...
-		lower_time = float(data.time_steps[this_index - 1])
-		upper_time = float(data.time_steps[this_index])
-		lower_temperature = float(data.temperature_steps[this_index - 1])
-		upper_temperature = float(data.temperature_steps[this_index])
+	these_integrals = []
 
+	for i in range(len(lower_time)):
 		# ... then the slope and intercept to calculate the temperature ...
 		# Since I calculate the activation energy over time I need to know 
 		# how the temperature develops. What I do is that I take the temperature 
 		# limits of a given integral and assume that the temperature develops
 		# linear.
-		slope = (upper_temperature - lower_temperature) / (upper_time - lower_time)
-		intercept = upper_temperature - slope * upper_time
+		slope = (upper_temperature[i] - lower_temperature[i]) / \
+											(upper_time[i] - lower_time[i])
+		intercept = upper_temperature[i] - slope * upper_time[i]
 
 		# ... and then integrate :).
 		# I don't use any specific rule for integration but .quad() which is
 		# general. It should be OK, since I assume rather narrow integration
 		# steps. The lambda expression works as the function .quad() shall 
 		# over in the given limits.
-		integral = integrate.quad(lambda time: np.exp(-E/8.314/(slope * time + intercept)), \
-															lower_time, upper_time)[0]
+		integral = integrate.quad(lambda time: np.exp(-E/R/(slope * time + intercept)), \
+													lower_time[i], upper_time[i])[0]
 
 		these_integrals.append(integral)
 
@@ -100,6 +153,64 @@ def all_integrals(E, all_data, this_index):
 
 
 
+# Since the temperature develops linear in time between the limits, the 
+# integral over time can be written as integral over the temperature:
+# 
+# integral exp(-E/RT) dt = 1/slope * integral exp(-c/T) dT   with c = E/R
+# 
+# and the latter has the antiderivative F(T) = T*exp(-c/T) - c*E1(c/T), 
+# with E1 the exponential integral. This is calculated for all limits at 
+# once. All parameters can be arrays of any shape as long as numpy can 
+# broadcast these.
+# 
+# For (nearly) isothermal steps slope is (nearly) zero and the difference
+# F(T_upper) - F(T_lower) looses all precision. For these steps (and in the 
+# weird case that E is not positive) Gauss-Legendre quadrature is used, 
+# which is exact enough since the integrand hardly changes in these cases.
+# 
+# If < gradient > is True, the derivatives of the integrals with respect to 
+# E are returned, too. dF/dc is simply -E1(c/T), thus these come almost for
+# free.
+def closed_form_integrals(E, lower_time, upper_time, lower_temperature, \
+										upper_temperature, gradient = False):
+	c = np.asarray(E, dtype = np.float64) / R
+	time_difference = upper_time - lower_time
+	temperature_difference = upper_temperature - lower_temperature
+
+	closed_form = (c > 0) & (np.abs(temperature_difference) > \
+										MINIMUM_RELATIVE_RAMP * upper_temperature)
+
+	with np.errstate(all = 'ignore'):
+		upper_E1 = special.exp1(c / upper_temperature)
+		lower_E1 = special.exp1(c / lower_temperature)
+		upper_F = upper_temperature * np.exp(-c / upper_temperature) - c * upper_E1
+		lower_F = lower_temperature * np.exp(-c / lower_temperature) - c * lower_E1
+		slope = temperature_difference / time_difference
+		integrals = (upper_F - lower_F) / slope
+
+	# The temperature at the nodes is calculated directly from the limits. 
+	# The last axis are the nodes.
+	fraction = (GAUSS_NODES + 1.0) / 2.0
+	lower_temperature = np.asarray(lower_temperature)[..., None]
+	temperature_difference = np.asarray(temperature_difference)[..., None]
+	temperatures = lower_temperature + temperature_difference * fraction
+	integrand = np.exp(-np.asarray(c)[..., None] / temperatures)
+	quadrature = (integrand * GAUSS_WEIGHTS).sum(axis = -1) * time_difference / 2.0
+
+	integrals = np.where(closed_form, integrals, quadrature)
+	if not gradient:
+		return integrals
+
+	# The derivative of the integrand is -1/RT * exp(-E/RT).
+	with np.errstate(all = 'ignore'):
+		gradients = -(upper_E1 - lower_E1) / slope / R
+	quadrature = (-integrand / (R * temperatures) * GAUSS_WEIGHTS).sum(axis = -1) * \
+														time_difference / 2.0
+
+	return integrals, np.where(closed_form, gradients, quadrature)
+
+
+
 # This function calculates the inner sum with the given parameters.
 def inner_sum(i_integral, j_integrals):
 	inner_sum = 0.0
@@ -110,12 +221,29 @@ def inner_sum(i_integral, j_integrals):
 
 
 
-# This actually calculates the double sum with the given parameters.
+# The double sum below, written as
+# 
+# sum_i sum_(j != i) I_i / I_j = (sum_i I_i) * (sum_j 1 / I_j) - n
+# 
+# (the terms with i = j are all one and there are n of these). Thus it 
+# needs just one pass over the integrals instead of n^2 divisions.
+# < these_integrals > can be a list or a numpy-array.
 def calculate_double_sum(these_integrals):
+	these_integrals = np.asarray(these_integrals, dtype = np.float64)
+	n = len(these_integrals)
+
+	return these_integrals.sum() * (1.0 / these_integrals).sum() - n
+
+
+
+# This actually calculates the double sum with the given parameters.
+# This is how it was done originally and is kept as reference for 
+# calculate_double_sum().
+def calculate_double_sum_reference(these_integrals):
 	double_sum = 0.0
 	# The outer sum counts over i and the inner sum over j.
-	for i_integral in these_integrals:
-		j_integrals = [x for x in these_integrals if x is not i_integral]
+	for i, i_integral in enumerate(these_integrals):
+		j_integrals = [x for j, x in enumerate(these_integrals) if j != i]
 
 		double_sum += inner_sum(i_integral, j_integrals)
 
@@ -129,8 +257,9 @@ def calculate_double_sum(these_integrals):
 # other functions.
 # < initial_guess > is the parameter of interest and it will be 
 # changed by minimize() until the result calculated in here is minimal.
-def double_sum(E, all_data, this_index):
-	these_integrals = all_integrals(E, all_data, this_index)
+def double_sum(E, time_steps, temperature_steps, this_index, engine = 'closed_form'):
+	these_integrals = all_integrals(E, time_steps, temperature_steps, \
+															this_index, engine)
 
 	double_sum = calculate_double_sum(these_integrals)
 
@@ -138,27 +267,296 @@ def double_sum(E, all_data, this_index):
 
 
 
+# The same as double_sum() but returns in addition the derivative of the 
+# double sum with respect to E, so that minimize() doesn't need to estimate 
+# it from additional calculations. With (sum_i I_i) * (sum_j 1 / I_j) - n
+# (see calculate_double_sum()) the derivative is
+# 
+# (sum_i I_i') * (sum_j 1 / I_j) - (sum_i I_i) * (sum_j I_j' / I_j^2)
+# 
+# Works just with the closed form, see closed_form_integrals().
+def double_sum_and_gradient(E, time_steps, temperature_steps, this_index):
+	# minimize() hands over E as an array with one element.
+	E = float(np.squeeze(E))
+
+	these_integrals, these_gradients = closed_form_integrals(E, \
+				time_steps[:, this_index - 1], time_steps[:, this_index], \
+				temperature_steps[:, this_index - 1], temperature_steps[:, this_index], \
+																gradient = True)
+	n = len(these_integrals)
+
+	integral_sum = these_integrals.sum()
+	inverse_sum = (1.0 / these_integrals).sum()
+	double_sum = integral_sum * inverse_sum - n
+	gradient = these_gradients.sum() * inverse_sum - \
+							integral_sum * (these_gradients / these_integrals**2).sum()
+
+	return double_sum, np.array([gradient])
+
+
+
+# The same as double_sum() but for many conversion steps (given by their 
+# UPPER integral limits < indices >) at once, with one activation energy
+# per step in < E >. The integrals are a 2-D array (experiments x steps),
+# thus the double sum of each step is calculated along the first axis.
+def batched_double_sums(E, time_steps, temperature_steps, indices):
+	indices = np.asarray(indices)
+	these_integrals = closed_form_integrals(E, time_steps[:, indices - 1], \
+				time_steps[:, indices], temperature_steps[:, indices - 1], \
+											temperature_steps[:, indices])
+	n = these_integrals.shape[0]
+
+	return these_integrals.sum(axis = 0) * (1.0 / these_integrals).sum(axis = 0) - n
+
+
+
+# Minimizes the double sum for all conversion steps in < indices > at once 
+# by a golden ratio section search within < bounds >. Each iteration 
+# calculates the double sums of all steps with one call of 
+# batched_double_sums(), thus there is no python code running per step 
+# anymore. This pays off for very small conversion increments.
+# Yields the same as sweep_outcomes(). The number of calculations is given 
+# per step.
+def batched_outcomes(indices, time_steps, temperature_steps, \
+						bounds = ACTIVATION_ENERGY_BOUNDS, tolerance = BATCHED_TOLERANCE):
+	# If the double sum can't be calculated (it is nan) for an activation 
+	# energy, this point is treated as worse than all others.
+	def these_double_sums(E):
+		values = batched_double_sums(E, time_steps, temperature_steps, indices)
+		return np.where(np.isnan(values), np.inf, values)
+
+	golden_ratio = (np.sqrt(5.0) - 1.0) / 2.0
+	lower = np.full(len(indices), float(bounds[0]))
+	upper = np.full(len(indices), float(bounds[1]))
+
+	left = upper - golden_ratio * (upper - lower)
+	right = lower + golden_ratio * (upper - lower)
+	left_values = these_double_sums(left)
+	right_values = these_double_sums(right)
+	evaluations = 2
+
+	# In each iteration the interval of each step shrinks by the same factor,
+	# thus all steps are done after the same number of iterations.
+	while (upper - lower).max() > tolerance:
+		go_left = left_values < right_values
+
+		upper = np.where(go_left, right, upper)
+		lower = np.where(go_left, lower, left)
+		new_left = upper - golden_ratio * (upper - lower)
+		new_right = lower + golden_ratio * (upper - lower)
+
+		# The inner point which is kept is one of the new inner points, 
+		# just the other one needs to be calculated.
+		new_E = np.where(go_left, new_left, new_right)
+		new_values = these_double_sums(new_E)
+		evaluations += 1
+
+		# If the minimum is in the left part the old left point becomes the
+		# new right point, otherwise the old right point the new left point.
+		left, right = np.where(go_left, new_left, right), \
+										np.where(go_left, left, new_right)
+		left_values, right_values = np.where(go_left, new_values, right_values), \
+										np.where(go_left, left_values, new_values)
+
+	E = (lower + upper) / 2.0
+	values = batched_double_sums(E, time_steps, temperature_steps, indices)
+	evaluations += 1
+
+	for i in range(len(indices)):
+		yield E[i], values[i], evaluations, False
+
+
+
 # This function minimizes the double sum in the isoconversional equation for 
 # a given conversion.
 # < all_data > is in order but probably unsorted. However, the latter 
 # doesn't matter as long as it is in order.
-def outcome_for_one_value(this_index, all_data, initial_guess):
-	# See comment to all_integrals() why I convert to float.
-	E = float(initial_guess)
-
-	outcome = minimize(double_sum, E, args = (all_data, this_index))
+# < solver > can be 'bfgs' or 'bounded'. The former is scipy's default 
+# minimize() which starts at < initial_guess >. However, it sometimes runs 
+# away to negative or extremely large activation energies. The latter searches
+# just within < bounds > (Brent's method, ignores < initial_guess >) and
+# needs a much more predictable number of calculations.
+def outcome_for_one_value(this_index, time_steps, temperature_steps, \
+										initial_guess, engine = 'closed_form', \
+					solver = 'bfgs', bounds = ACTIVATION_ENERGY_BOUNDS):
+	arguments = (time_steps, temperature_steps, this_index, engine)
+
+	if solver == 'bounded':
+		outcome = minimize_scalar(double_sum, bounds = bounds, args = arguments, \
+															method = 'bounded')
+		return outcome['x'], outcome['fun'], outcome['nfev'], outcome['success']
+
+	# See comment to create_step_arrays() why I convert to float.
+	E = float(initial_guess) / ENERGY_SCALE
+
+	# With the closed form the derivative is calculated together with the 
+	# double sum, which is faster and more exact than estimating it.
+	if engine == 'closed_form':
+		outcome = minimize(scaled_double_sum_and_gradient, E, \
+										args = arguments[:-1], jac = True)
+	else:
+		outcome = minimize(scaled_double_sum, E, args = arguments)
 
 	# 'fun' is the value of the function. It should be n(n - 1) with n
 	# as the number of measurements.
 	# 'x' is what I'm interested in, the activation energy for the given
 	# value of conversion.
-	return outcome['x'][0], outcome['fun']
+	# 'nfev' is how often the double sum was calculated.
+	# 'success' is False if minimize() didn't find a minimum.
+	return outcome['x'][0] * ENERGY_SCALE, outcome['fun'], outcome['nfev'], \
+															outcome['success']
+
+
+
+# double_sum() and double_sum_and_gradient() with < E > in kJ/mol, see 
+# ENERGY_SCALE.
+def scaled_double_sum(E, *arguments):
+	return double_sum(E * ENERGY_SCALE, *arguments)
 
 
+def scaled_double_sum_and_gradient(E, *arguments):
+	value, gradient = double_sum_and_gradient(E * ENERGY_SCALE, *arguments)
+
+	return value, gradient * ENERGY_SCALE
+
+
+
+# The activation energy changes smoothly with the conversion. Thus the 
+# results of the previous conversion steps (< previous >) are a much better 
+# starting point for the next step than the initial guess of the user. 
+# The activation energy is linearly extrapolated from the last two results.
+# Returns None if there are no previous results.
+def warm_start_guess(previous):
+	if not previous:
+		return None
+	elif len(previous) == 1:
+		return previous[-1]
+
+	return 2.0 * previous[-1] - previous[-2]
+
+
+
+# A minimization which started from the previous steps is just used if 
+# minimize() found a minimum at a reasonable activation energy. Otherwise 
+# (e.g. because the previous step went wrong and the extrapolation is far 
+# off) the step is calculated again from the initial guess of the user.
+def is_good_outcome(E, value, success, bounds):
+	return success and np.isfinite(value) and (bounds[0] <= E <= bounds[1])
+
+
+
+# Yields the outcome for each conversion step in < indices > one after the 
+# other.
+# < options > is a dict with the keys 'engine' (see all_integrals()), 
+# 'solver', 'bounds' (see outcome_for_one_value()) and 'continuation'. If the 
+# latter is True each step starts from the results of the previous steps, see 
+# warm_start_guess() and is_good_outcome(). The bounded solver doesn't need a 
+# starting point, thus continuation does nothing for it.
+# The outcome is the activation energy, the value of the double sum, how 
+# often the double sum was calculated and if the result is from a start at
+# the previous steps.
+def sweep_outcomes(indices, time_steps, temperature_steps, initial_guess, options):
+	engine = options['engine']
+	solver = options['solver']
+	bounds = options['bounds']
+	previous = []
+
+	for this_index in indices:
+		guess = None
+		if options['continuation'] and solver != 'bounded':
+			guess = warm_start_guess(previous)
+
+		evaluations = 0
+		warm_start = False
+		if guess is not None:
+			E, value, evaluations, success = outcome_for_one_value(this_index, \
+						time_steps, temperature_steps, guess, engine, solver, bounds)
+			warm_start = is_good_outcome(E, value, success, bounds)
+
+		if not warm_start:
+			E, value, these_evaluations, _ = outcome_for_one_value(this_index, \
+				time_steps, temperature_steps, initial_guess, engine, solver, bounds)
+			evaluations += these_evaluations
+
+		previous.append(E)
+
+		yield E, value, evaluations, warm_start
+
+
+
+# The conversion steps are independent of each other. Thus these can be 
+# calculated in parallel. Each process gets the time and temperature steps
+# just once when it is started (and not the whole Data objects) and stores
+# them here.
+worker_steps = {}
+
+def initialize_worker(time_steps, temperature_steps):
+	worker_steps['time_steps'] = time_steps
+	worker_steps['temperature_steps'] = temperature_steps
+
+
+
+# This is what each process does: calculate the outcome for some conversion
+# steps (given by their indices).
+# ATTENTION: with continuation each chunk would start again from the initial
+# guess, thus calculate_activation_energy() doesn't use processes for it.
+def solve_chunk(indices, initial_guess, options):
+	time_steps = worker_steps['time_steps']
+	temperature_steps = worker_steps['temperature_steps']
+
+	return list(sweep_outcomes(indices, time_steps, temperature_steps, \
+														initial_guess, options))
+
+
+
+# Yields the outcomes for all < indices > in the same order as these are, 
+# no matter which process was faster. Thus the results are exactly the same 
+# as if calculated one after the other.
+# < chunksize > is the number of conversion steps which are given to a 
+# process at once. If not given, each process gets about four chunks.
+def parallel_outcomes(indices, time_steps, temperature_steps, initial_guess, \
+										options, workers, chunksize = None):
+	if not chunksize:
+		chunksize = max(1, -(-len(indices) // (4 * workers)))
+
+	chunks = [indices[i:(i + chunksize)] for i in range(0, len(indices), chunksize)]
+
+	with ProcessPoolExecutor(max_workers = workers, initializer = initialize_worker, \
+							initargs = (time_steps, temperature_steps)) as executor:
+		for outcomes in executor.map(solve_chunk, chunks, repeat(initial_guess), \
+																repeat(options)):
+			for outcome in outcomes:
+				yield outcome
+
+
+
+# Tells the user how often the double sum was calculated and for how many 
+# steps the start from the previous steps was used.
+def report_evaluations(all_evaluations, warm_starts):
+	total = sum(all_evaluations)
+	print('\nThe double sum was calculated {} times.'.format(total))
+
+	if any(warm_starts):
+		this = '{} of {} steps were calculated '.format(sum(warm_starts), len(warm_starts))
+		that = 'starting from the previous steps.'
+		print(this + that)
+
 
 
 # This function calls more or less all of the above.
-def calculate_activation_energy(all_data, initial_guess):
+# < engine > see all_integrals().
+# < workers > is the number of processes that calculate the conversion steps
+# in parallel. One (or None) means that it is done one after the other in 
+# this process. See parallel_outcomes() regarding < chunksize >.
+# < continuation > see sweep_outcomes(). Each step needs the results of the
+# previous steps, thus these are calculated one after the other, no matter
+# what < workers > is.
+# < solver > and < bounds > see outcome_for_one_value(). In addition < solver >
+# can be 'batched' to calculate all steps at once (ignores < engine >, 
+# < workers > and < continuation >), see batched_outcomes().
+def calculate_activation_energy(all_data, initial_guess, engine = 'closed_form', \
+						workers = None, chunksize = None, continuation = False, \
+							solver = 'bfgs', bounds = ACTIVATION_ENERGY_BOUNDS):
 	# Get the list with the steps of the desired conversion steps ...
 	smallest_conversion = find_smallest_conversion(all_data)
 	# ... but don't get higher than possible. See comment to 
@@ -166,12 +564,28 @@ def calculate_activation_energy(all_data, initial_guess):
 	conversion_steps = [x for x in all_data[0].conversion_steps if x <= smallest_conversion]
 	activation_energies = []
 	control_parameters = []
+	all_evaluations = []
+	warm_starts = []
+
+	time_steps, temperature_steps = create_step_arrays(all_data, len(conversion_steps))
+	options = {'engine':engine, 'continuation':continuation, 'solver':solver, \
+															'bounds':bounds}
 
 	# Don't calculate anything for time = 0!
-	for i in range(1, len(conversion_steps)):
+	indices = list(range(1, len(conversion_steps)))
+
+	if solver == 'batched':
+		outcomes = batched_outcomes(indices, time_steps, temperature_steps, bounds)
+	elif workers and workers > 1 and not continuation:
+		outcomes = parallel_outcomes(indices, time_steps, temperature_steps, \
+								initial_guess, options, workers, chunksize)
+	else:
+		outcomes = sweep_outcomes(indices, time_steps, temperature_steps, \
+													initial_guess, options)
+
+	for i, outcome in zip(indices, outcomes):
 		this_conversion = conversion_steps[i]
-		activation_energy, control_parameter = outcome_for_one_value(i, \
-														all_data, initial_guess)
+		activation_energy, control_parameter, evaluations, warm_start = outcome
 
 		# 'fun' is the value of the function. It should be n(n - 1) with n
 		# as the number of measurements.
@@ -179,11 +593,15 @@ def calculate_activation_energy(all_data, initial_guess):
 		# value of conversion.
 		activation_energies.append(activation_energy)
 		control_parameters.append(control_parameter)
+		all_evaluations.append(evaluations)
+		warm_starts.append(warm_start)
 
 		this = '{}\t{}\t{}'.format(this_conversion, activation_energy, \
 															control_parameter)
 		print(this)
 
+	report_evaluations(all_evaluations, warm_starts)
+
 	# conversion_steps still contains the zero value as the first element, as 
 	# it is needed for the very first step of the above procedure. However, 
 	# activation_energies and control_parameters don't have this value. 
@@ -226,9 +644,24 @@ E.g. just the isothermal data from several experiments at different temperatures
 	initial_conversion = af.get_user_input('initial_conversion', True, 'float')
 
 	conversion_step = af.get_user_input('conversion_step')
+	interpolation = af.get_user_input('interpolation')
+
+	solver = af.get_user_input('solver')
+
+	if solver != 'bfgs':
+		# Not needed by the other solvers.
+		initial_guess = None
+		continuation = False
+	else:
+		text = 'Initial guess for the activation energy in J/mol: '
+		initial_guess = af.get_user_input(text)
 
-	text = 'Initial guess for the activation energy in J/mol: '
-	initial_guess = af.get_user_input(text)
+		continuation = af.get_user_input('continuation')
+
+	# With continuation the steps are calculated one after the other anyway.
+	workers = None
+	if not continuation:
+		workers = af.get_user_input('workers')
 
 
 	# Yes, this is a hard coded filename.
@@ -241,7 +674,9 @@ E.g. just the isothermal data from several experiments at different temperatures
 	# filenames. This is the only exception from the rule stated above and the
 	# reason why the outfile_name is hard coded. Over many runs it turned out
 	# that this is a good thing to do.
-	filenames = [x for x in os.listdir(path) if '00000_activation' not in x.lower()]
+	# The folder with the cached data is of course also not a data file.
+	filenames = [x for x in os.listdir(path) if '00000_activation' not in x.lower() \
+												and x != cd.CACHE_FOLDER]
 
 	print('')
 
@@ -250,7 +685,8 @@ E.g. just the isothermal data from several experiments at different temperatures
 
 	for filename in filenames:
 		print("Working on {} ...".format(filename))
-		data = cd.Data(timestep, path + filename)
+		storage = af.choose_storage(path + filename)
+		data = cd.Data(timestep, path + filename, storage, cache = True)
 
 
 		data.in_kelvin = in_kelvin
@@ -276,7 +712,11 @@ E.g. just the isothermal data from several experiments at different temperatures
 		data.conversion_step = conversion_step
 
 		print("Finding the time and temperature values for the integral limits ...")
-		data.find_values_for_isoconversion()
+		data.find_values_for_isoconversion(interpolation)
+
+		# Just the values at the steps are needed from here on, the rest
+		# doesn't need to take up disk space (just for very long files).
+		data.remove_derived_columns()
 
 
 		all_data.append(data)
@@ -285,15 +725,19 @@ E.g. just the isothermal data from several experiments at different temperatures
 
 	conversion_steps, activation_energies, \
 					control_parameters = calculate_activation_energy(all_data, \
-																	initial_guess)
+							initial_guess, workers = workers, continuation = continuation, \
+																solver = solver)
 
 
 	with open(outfile, 'w') as f:
 		this = 'conversion\tActivation Energy (J/mol)\tControl Parameter\n'
 		f.write(this)
 		for i in range(len(conversion_steps)):
-			this = "{}\t{}\t{}\n".format(conversion_steps[i], \
-									activation_energies[i], control_parameters[i])
+			# Floats are written like in all other files, see 
+			# af.format_float().
+			values = [conversion_steps[i], activation_energies[i], control_parameters[i]]
+			values = [af.format_float(x) if isinstance(x, float) else x for x in values]
+			this = "{}\t{}\t{}\n".format(*values)
 			f.write(this)
 
 
@@ -37,6 +37,8 @@ import class_definitions as cd
 import os
 from copy import deepcopy
 import kinetic_functions as kf
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## 
 ## ## ## ## ## ## ##                            ## ## ## ## ## ## ## 
@@ -124,6 +126,79 @@ def create_table_header(new_data):
 
 
 
+# Everything that is done for one file: calculate all values, fit and write 
+# both files. The files are independent of each other, thus this function 
+# can run in a separate process for each file. 
+# Returns the filename and the compensation parameters, the mean values are
+# calculated in main().
+# < verbose > is False if several files are processed at the same time, 
+# otherwise the messages of all processes would be mixed up.
+def process_file(filename, path, timestep, in_kelvin, total_heat, \
+									initial_conversion, verbose = True):
+	# Just to keep the lines below short.
+	say = print if verbose else lambda *text: None
+
+	say("Working on {} ...".format(filename))
+	storage = af.choose_storage(path + filename)
+	data = cd.Data(timestep, path + filename, storage, cache = True, \
+													verbose = verbose)
+
+
+	data.in_kelvin = in_kelvin
+	if not in_kelvin:
+		say("Setting temperature to Kelvin ...")
+	# create_temperature_in_kelvin() will be called even if the temperature
+	# is already in Kelvin, because it contains a check if the data 
+	# actually has temperature data. This is just a check, which is probably
+	# not necessary.
+	data.create_temperature_in_kelvin()
+
+
+	if not total_heat:
+		say("Calculating total heat of reaction ...")
+		data.calculate_total_heat_of_reaction()
+	else:
+		data.total_heat = deepcopy(total_heat)
+
+
+	say("Calculating the conversion ...")
+	data.calculate_conversion(total_heat, initial_conversion)
+
+
+	say("Calculating the kinetic model values ...")
+	data.calculate_left_hand_side()
+
+
+	say("Fitting ...")
+	data.fit_all_for_compensation_parameters()
+
+
+	say("Writing calculated values to a file ...")
+	outfile_name = '0000_calculated_function_values_{}'.format(filename)
+	outfile = path + outfile_name
+
+
+	order_of_variables = create_table_header(data)
+	af.write_to_file(outfile, data, order_of_variables)
+
+
+	outfile_name = '0001_calculated_fitting_parameters_{}'.format(filename)
+	outfile = path + outfile_name
+	write_linear_fitting_parameters(outfile, data, 'per_model')
+
+	# For very long files the calculated values take up a lot of disk space.
+	data.remove_derived_columns()
+
+
+	say()
+
+	if not verbose:
+		print("Finished {} .".format(filename))
+
+	return filename, data.a, data.b
+
+
+
 def main():
 	print("""\n\nCalculating the compensation parameters.\n
 ATTENTION: It is assumed that the input-files ran through the "step_separator"-program.
@@ -155,16 +230,19 @@ ATTENTION: For each input file a file with the calculated parameters and a secon
 	in_kelvin = af.get_user_input('kelvin')
 	total_heat = af.get_user_input('total_heat', True, 'float')
 	initial_conversion = af.get_user_input('initial_conversion', True, 'float')
+	workers = af.get_user_input('workers')
 
 
 	# That the user does NOT need to delete all the time the file this 
 	# program creates these are taken out from the list with the filenames
 	# in the folder. This is the reason why the outfile_name(s) are hard coded. 
 	# Over many runs it turned out that this is a good thing to do.
+	# The folder with the cached data (if any) is excluded, too.
 	filenames = [x for x in os.listdir(path) if ('0000_calculated' not in x.lower() and \
 												'0001_calculated' not in x.lower()) and \
 												'00000_activation' not in x.lower() and \
-												'00000_compensation' not in x.lower()]
+												'00000_compensation' not in x.lower() and \
+											x != cd.CACHE_FOLDER]
 
 	print('')
 
@@ -173,60 +251,23 @@ ATTENTION: For each input file a file with the calculated parameters and a secon
 	all_b = []
 	
 
-	for filename in filenames:
-		print("Working on {} ...".format(filename))
-		data = cd.Data(timestep, path + filename)
-
-
-		data.in_kelvin = in_kelvin
-		if not in_kelvin:
-			print("Setting temperature to Kelvin ...")
-		# create_temperature_in_kelvin() will be called even if the temperature
-		# is already in Kelvin, because it contains a check if the data 
-		# actually has temperature data. This is just a check, which is probably
-		# not necessary.
-		data.create_temperature_in_kelvin()
-
-
-		if not total_heat:
-			print("Calculating total heat of reaction ...")
-			data.calculate_total_heat_of_reaction()
-		else:
-			data.total_heat = deepcopy(total_heat)
-
-
-		print("Calculating the conversion ...")
-		data.calculate_conversion(total_heat, initial_conversion)
-
-
-		print("Calculating the kinetic model values ...")
-		data.calculate_left_hand_side()
-
-
-		print("Fitting ...")
-		data.fit_all_for_compensation_parameters()
-
-
-		all_a.append(data.a)
-		all_b.append(data.b)
-		all_compensation_parameters.update({filename:{'a':data.a, 'b':data.b}})
-
-
-		print("Writing calculated values to a file ...")
-		outfile_name = '0000_calculated_function_values_{}'.format(filename)
-		outfile = path + outfile_name
-
-
-		order_of_variables = create_table_header(data)
-		af.write_to_file(outfile, data, order_of_variables)
-
-
-		outfile_name = '0001_calculated_fitting_parameters_{}'.format(filename)
-		outfile = path + outfile_name
-		write_linear_fitting_parameters(outfile, data, 'per_model')
-
-
-		print()
+	if workers > 1:
+		print("Working on {} files with {} processes ...".format(len(filenames), workers))
+		with ProcessPoolExecutor(max_workers = workers) as executor:
+			results = list(executor.map(process_file, filenames, repeat(path), \
+								repeat(timestep), repeat(in_kelvin), repeat(total_heat), \
+										repeat(initial_conversion), repeat(False)))
+	else:
+		results = [process_file(filename, path, timestep, in_kelvin, total_heat, \
+											initial_conversion) for filename in filenames]
+
+	# The results are in the same order as the filenames, no matter which 
+	# process was faster. Thus the mean values are exactly the same as if 
+	# all files were processed one after the other.
+	for filename, a, b in results:
+		all_a.append(a)
+		all_b.append(b)
+		all_compensation_parameters.update({filename:{'a':a, 'b':b}})
 
 
 	a_mean = sum(all_a) / len(all_a)
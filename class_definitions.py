@@ -23,7 +23,7 @@ from decimal import Decimal as dec
 from copy import deepcopy
 import kinetic_functions as kf
 import numpy as np
-from scipy.optimize import curve_fit
+import scipy.integrate as integrate
 import additional_functions as af
 # When I use eval() i try to catch common errors. Since eval() is very 
 # powerful it can do much more than just calculate a value from a given 
@@ -31,6 +31,27 @@ import additional_functions as af
 # for the dec()-operation afterwards which uses the eval()-output. This 
 # will raise a decimal-error and for that I need the whole module.
 import decimal
+import io
+import warnings
+import os
+import hashlib
+import itertools
+import bisect
+import tempfile
+import shutil
+import weakref
+
+# Parsed files can be stored as binary files in this folder, which is created
+# in the same folder as the file itself. See _load_columns_cached().
+CACHE_FOLDER = '.kinetic_cache'
+
+# Number of lines which are parsed at once and number of values which are 
+# handled at once for storage = 'memmap'.
+CHUNK_SIZE = 1 << 18
+
+# Number of timesteps for which memory is reserved at most at once when the 
+# heat flow is predicted, see TrajectoryBuffer().
+BUFFER_SIZE = 1 << 20
 
 # This is basically just a data container in which each the most attribute are
 # all the data for one variable for one step of one eperiment.
@@ -45,33 +66,85 @@ import decimal
 # heat capacity values!
 # 
 # < timestep > already comes as dec()-number.
+# 
+# < storage > decides how the values of the data-attributes are kept.
+# 'decimal' (the default) are lists with dec()-numbers, like it always was.
+# 'array' are contiguous numpy float64-arrays. The latter need much less memory
+# and all the calculations are done on the whole array at once, which is MUCH
+# faster for long files (e.g. 0.1 s timestep over several hours). A list with
+# dec()-numbers can still be obtained with as_decimal() if really needed.
+# 
+# < verbose > is False if the messages about the progress shall not be 
+# printed (e.g. if several files are processed at the same time). Warnings 
+# are always printed.
+# 
+# < cache > (just for 'array'-storage) stores the parsed columns in 
+# CACHE_FOLDER next to the file. The next time the same file is read with the
+# same timestep the text is not parsed again.
+# 
+# 'memmap'-storage is for files which are too large to keep several copies of
+# the data in the memory. The file is converted once into the binary cache 
+# files and the data-attributes are numpy-arrays which are memory-mapped to
+# these files. Everything which is calculated from the data (conversion, 
+# baseline correction etc.) is done chunk by chunk and written into new 
+# memory-mapped files in a temporary folder in the cache folder. Thus the 
+# memory which is used stays the same no matter how long the file is.
+# ATTENTION: The calculated files need many times the disk space of the 
+# parsed data (more than ten times for the compensation parameters). They are 
+# removed with remove_derived_columns() when the results are written, at the
+# latest when the instance is gone or the program ends.
 class Data(object):
-	def __init__(self, timestep, infile):
-		self.original_variables, rawdata = self._extract_data(infile)
-		print("Structuring data ...")
+	# Also for the child classes, which don't call the __init__ of this class.
+	verbose = True
+
+	def __init__(self, timestep, infile, storage = 'decimal', cache = False, \
+															verbose = True):
+		self.storage = storage
+		self.verbose = verbose
 		self.variables = []
 		self.timestep = timestep
-		self.number_of_measurements = len(rawdata)
-		# Here self.indices and self.variables are created. The former is the 
-		# information where in the rawdata the specific information can be found
-		# for a variable stored in the latter.
-		self._create_variable_indices()
-		# Here the data-attributes are created. These are lists which contain 
-		# the data for each timestep
-		self._create_data_attributes(rawdata)
+		self.cache_folder = None
+		# Counts the memory-mapped files which were created, see _new_column().
+		self.derived_columns = 0
+		self.derived_folder = None
+
+		# For arrays the columns of interest are parsed directly into 
+		# float64-arrays in one go. No rawdata-list is needed.
+		if self.storage == 'memmap' or (self.storage == 'array' and cache):
+			self._load_columns_cached(infile)
+		elif self.storage == 'array':
+			self._load_columns(infile)
+		else:
+			self.original_variables, rawdata = self._extract_data(infile)
+			self._say("Structuring data ...")
+			self.number_of_measurements = len(rawdata)
+			# Here self.indices and self.variables are created. The former is the 
+			# information where in the rawdata the specific information can be found
+			# for a variable stored in the latter.
+			self._create_variable_indices()
+			# Here the data-attributes are created. These are lists which contain 
+			# the data for each timestep
+			self._create_data_attributes(rawdata)
+
 		self._make_all_data_equally_long()
 		# The timestep may be in minutes in the original file. I need it to be
 		# in seconds. Thus I overwrite the time data here.
 		self._create_time_in_seconds()
 
 
+	# Messages about the progress, see < verbose >.
+	def _say(self, *text):
+		if self.verbose:
+			print(*text)
+
+
 	# This function extracts the data from a simple txt-file and returns the data
 	# line by line but already separated into the entries.
 	# ATTENTION: It is assumed that tabs separate the columns.
 	# ATTENTION: It is assumed that the first line contains the variables.
 	# ATTENTION: It is assumed that the file contains from the second line on JUST data.
 	def _extract_data(self, infile):
-		print("\nReading data ...")
+		self._say("\nReading data ...")
 		# This will be a list that contains lists.
 		all_data = []
 
@@ -90,6 +163,308 @@ class Data(object):
 		return variables, all_data
 
 
+	# Same assumptions as for _extract_data(), but for storage = 'array' or
+	# 'memmap'.
+	# Just the columns found by _create_variable_indices() are parsed and
+	# each of them ends up directly as float64-array in its attribute.
+	# Comma decimals and empty cells are taken care of while parsing.
+	# The file is parsed in chunks of CHUNK_SIZE lines. If < folder > is given
+	# the values are written directly into memory-mapped files in there
+	# and the whole file is never in the memory.
+	def _load_columns(self, infile, folder = None):
+		self._say("\nReading data ...")
+		if folder:
+			number_of_lines = max(self._count_lines(infile), 1)
+
+		with open(infile, 'r', encoding='utf8', errors='ignore') as f:
+			self.original_variables = f.readline().split('\t')
+
+			self._say("Structuring data ...")
+			self._create_variable_indices()
+			columns = [self.indices[variable] for variable in self.variables]
+
+			all_values = []
+			for variable in self.variables:
+				if folder:
+					filename = os.path.join(folder, '{}.npy'.format(variable))
+					all_values.append(np.lib.format.open_memmap(filename, \
+						mode = 'w+', dtype = np.float64, shape = (number_of_lines,)))
+				else:
+					all_values.append([])
+
+			# The last value of the previous chunk is needed to fill empty 
+			# cells at the beginning of the next chunk.
+			last_values = [np.nan] * len(self.variables)
+			length = 0
+			lines = list(itertools.islice(f, CHUNK_SIZE))
+			while lines:
+				# Tabs separate the columns, thus a comma can just be a decimal
+				# comma.
+				text = ''.join(lines).replace(',', '.')
+				table = self._parse_columns(text, columns)
+
+				for i in range(len(self.variables)):
+					values = self._fill_empty_cells(table[:, i], length, last_values[i])
+					if len(values) > 0:
+						last_values[i] = values[-1]
+
+					if folder:
+						all_values[i][length:(length + len(values))] = values
+					else:
+						all_values[i].append(values)
+
+				length += len(table)
+				lines = list(itertools.islice(f, CHUNK_SIZE))
+
+		self.number_of_measurements = length
+
+		for i in range(len(self.variables)):
+			if folder:
+				all_values[i].flush()
+				values = all_values[i][:length]
+			else:
+				values = np.concatenate(all_values[i]) if all_values[i] else np.empty(0)
+
+			setattr(self, self.variables[i], values)
+
+
+	# Needed to know how large the memory-mapped files need to be before 
+	# the file is parsed. Empty or broken lines are counted, too, thus this is 
+	# an upper bound.
+	def _count_lines(self, infile):
+		number_of_lines = 0
+		with open(infile, 'rb') as f:
+			for chunk in iter(lambda: f.read(1 << 20), b''):
+				number_of_lines += chunk.count(b'\n')
+
+		return number_of_lines + 1
+
+
+	# np.loadtxt() is fast, but it can neither handle empty cells nor lines
+	# with a missing column. Empty cells are marked as < nan > beforehand
+	# (twice, because two empty cells in a row share a tab). If some lines
+	# are broken anyway, np.genfromtxt() is used, which is slower but just
+	# skips these lines.
+	def _parse_columns(self, text, columns):
+		if not columns:
+			return np.empty((0, 0))
+
+		this = text.replace('\t\t', '\tnan\t').replace('\t\t', '\tnan\t')
+		this = this.replace('\t\n', '\tnan\n').replace('\n\t', '\nnan\t')
+		if this.startswith('\t'):
+			this = 'nan' + this
+		if this.endswith('\t'):
+			this = this + 'nan'
+
+		try:
+			table = np.loadtxt(io.StringIO(this), delimiter = '\t', \
+								usecols = columns, dtype = np.float64, ndmin = 2)
+		except ValueError:
+			with warnings.catch_warnings():
+				warnings.simplefilter('ignore')
+				table = np.genfromtxt(io.StringIO(text), delimiter = '\t', \
+								usecols = columns, dtype = np.float64, \
+												invalid_raise = False, ndmin = 2)
+
+		return table
+
+
+	# The cache for a file is a folder with one .npy-file per variable and a
+	# file which contains the key, the number of measurements and the original 
+	# table header. The key is the hash of the content of the file plus the 
+	# timestep (the latter is needed because of how empty cells are filled). 
+	# If the file was changed the key doesn't match anymore and the file is 
+	# parsed again.
+	def _load_columns_cached(self, infile):
+		path, filename = os.path.split(infile)
+		folder = os.path.join(path, CACHE_FOLDER, filename)
+		key = self._cache_key(infile)
+
+		if self.storage == 'memmap':
+			self.cache_folder = folder
+			self._remove_derived_columns()
+
+		if self._load_from_cache(folder, key):
+			return
+
+		# Memory-mapped data can just exist in the cache folder. Thus it
+		# is parsed directly into it and then read from it.
+		if self.storage == 'memmap':
+			os.makedirs(folder, exist_ok = True)
+			self._remove_key(folder)
+			self.variables = []
+			self._load_columns(infile, folder)
+			self._write_key(folder, key)
+			self.variables = []
+			self._load_from_cache(folder, key)
+		else:
+			self._load_columns(infile)
+			self._write_cache(folder, key)
+
+
+	# Read in chunks, the files can be large.
+	def _cache_key(self, infile):
+		this = hashlib.sha256()
+		with open(infile, 'rb') as f:
+			for chunk in iter(lambda: f.read(1 << 20), b''):
+				this.update(chunk)
+
+		return '{}_{}'.format(this.hexdigest(), self.timestep)
+
+
+	# Returns False if there is no valid cache, in which case nothing is set.
+	def _load_from_cache(self, folder, key):
+		keyfile = os.path.join(folder, 'key.txt')
+		mmap_mode = 'r' if self.storage == 'memmap' else None
+		try:
+			with open(keyfile, 'r', encoding='utf8') as f:
+				if f.readline().strip() != key:
+					return False
+				length = int(f.readline())
+				header = f.read()
+
+			self.original_variables = header.split('\t')
+			self._create_variable_indices()
+			for variable in self.variables:
+				filename = os.path.join(folder, '{}.npy'.format(variable))
+				values = np.load(filename, mmap_mode = mmap_mode)[:length]
+				setattr(self, variable, values)
+		except (OSError, ValueError):
+			self.variables = []
+			return False
+
+		self._say("\nReading data from cache ...")
+		self.number_of_measurements = length
+
+		return True
+
+
+	# The key is written last. If anything goes wrong before, the key file
+	# doesn't exist and the cache is simply not used next time.
+	def _write_cache(self, folder, key):
+		try:
+			os.makedirs(folder, exist_ok = True)
+			self._remove_key(folder)
+
+			for variable in self.variables:
+				np.save(os.path.join(folder, '{}.npy'.format(variable)), \
+													getattr(self, variable))
+
+			self._write_key(folder, key)
+		except OSError:
+			print("Could not write the cache for this file. Continuing without.")
+
+
+	def _write_key(self, folder, key):
+		keyfile = os.path.join(folder, 'key.txt')
+		with open(keyfile, 'w', encoding='utf8') as f:
+			header = '\t'.join(self.original_variables)
+			f.write('{}\n{}\n{}'.format(key, self.number_of_measurements, header))
+
+
+	def _remove_key(self, folder):
+		keyfile = os.path.join(folder, 'key.txt')
+		if os.path.isfile(keyfile):
+			os.remove(keyfile)
+
+
+	# Same rules as in _extract_from_raw(): an empty cell during the first 
+	# five minutes becomes zero, later on it gets the last value before it.
+	# < first_row > is the row in the file of the first value and 
+	# < last_value > the value before it, since the file is parsed in chunks.
+	def _fill_empty_cells(self, values, first_row = 0, last_value = np.nan):
+		missing = np.isnan(values)
+		if not missing.any():
+			return values
+
+		rows = np.arange(first_row, first_row + len(values))
+		early = rows * float(self.timestep) < 300
+		values[missing & early] = 0.0
+		missing = np.isnan(values)
+
+		# The index of the last actual value for each position. Indexing with
+		# it "continues" the value over the empty cells. If there is no 
+		# value before it in this chunk, it is the one from the chunk before.
+		last_index = np.where(missing, -1, np.arange(len(values)))
+		np.maximum.accumulate(last_index, out = last_index)
+		filled = values[last_index]
+		filled[last_index < 0] = last_value
+
+		return filled
+
+
+	# The following methods are just for storage = 'memmap'.
+	# 
+	# Everything that is calculated from the data is written into a new 
+	# memory-mapped file. It gets a new name each time, because the old one
+	# may still be needed to calculate the new one (e.g. the heat flow for
+	# the baseline corrected heat flow).
+	# The files are in a temporary folder of this instance in the cache folder
+	# (and not in the temporary folder of the system, which may be in the 
+	# memory). The folder is removed when the instance is gone or the program
+	# ends, if remove_derived_columns() wasn't called before.
+	def _new_column(self, name, dtype = np.float64):
+		if not self.derived_folder:
+			self.derived_folder = tempfile.mkdtemp(prefix = 'derived_', \
+															dir = self.cache_folder)
+			self._derived_cleanup = weakref.finalize(self, shutil.rmtree, \
+													self.derived_folder, True)
+
+		self.derived_columns += 1
+		this = '{}_{}.npy'.format(self.derived_columns, name)
+		filename = os.path.join(self.derived_folder, this)
+
+		return np.lib.format.open_memmap(filename, mode = 'w+', \
+						dtype = dtype, shape = (self.number_of_measurements,))
+
+
+	# To be called when the calculated values are not needed anymore, i.e. 
+	# after the results were written to file. Does nothing for the other 
+	# storage types.
+	def remove_derived_columns(self):
+		if self.derived_folder:
+			self._derived_cleanup()
+			self.derived_folder = None
+
+
+	# Files from previous runs which didn't end properly (e.g. a crash) are 
+	# not needed anymore.
+	# ATTENTION: This assumes that the same file isn't used by two programs
+	# at the same time.
+	def _remove_derived_columns(self):
+		if not os.path.isdir(self.cache_folder):
+			return
+
+		for filename in os.listdir(self.cache_folder):
+			this = os.path.join(self.cache_folder, filename)
+			if not filename.startswith('derived_'):
+				continue
+			if os.path.isdir(this):
+				shutil.rmtree(this, ignore_errors = True)
+			else:
+				os.remove(this)
+
+
+	# Slices for all values, CHUNK_SIZE values at a time.
+	def _chunks(self, length = None):
+		if length == None:
+			length = self.number_of_measurements
+
+		for start in range(0, length, CHUNK_SIZE):
+			yield slice(start, min(start + CHUNK_SIZE, length))
+
+
+	# < function > gets a slice and returns the new values for this slice.
+	def _map_column(self, name, function, dtype = np.float64):
+		values = self._new_column(name, dtype)
+		for this in self._chunks():
+			values[this] = function(this)
+
+		values.flush()
+
+		return values
+
+
 	# In the rawdata the variables may be in different columns. This function
 	# figures out in which column a ariable of interest actually is.
 	def _create_variable_indices(self):
@@ -142,6 +517,19 @@ class Data(object):
 			setattr(self, variable, this_data)
 
 
+	# If the data is stored as numpy-arrays, but some part of a program really
+	# needs the dec()-numbers, this returns a list with these for the given
+	# variable. The float-values are converted via str() to get the same 
+	# "nice" numbers which would have been read from the file.
+	# For 'decimal'-storage the list itself is returned.
+	def as_decimal(self, variable):
+		values = getattr(self, variable)
+		if self.storage == 'decimal':
+			return values
+
+		return [dec(str(x)) for x in values.tolist()]
+
+
 	# Here the actual data is extraced for a given variable.
 	def _extract_from_raw(self, rawdata, this_index):
 		data = []
@@ -190,6 +578,11 @@ class Data(object):
 
 		# Secondly: Cut the too long end from all other lists.
 		for variable in self.variables:
+			if self.storage != 'decimal':
+				values = getattr(self, variable)[:self.number_of_measurements]
+				setattr(self, variable, values)
+				continue
+
 			while len(getattr(self, variable)) > self.number_of_measurements:
 				getattr(self, variable).pop()
 
@@ -198,6 +591,19 @@ class Data(object):
 	# in minutes in the rawdata. Thus, just write this attribute again with 
 	# the given timestep.
 	def _create_time_in_seconds(self):
+		# The first value is one timestep, the last one is 
+		# number_of_measurements timesteps. Same as below, just all at once.
+		if self.storage == 'memmap':
+			timestep = float(self.timestep)
+			f = lambda this: np.arange(this.start + 1, this.stop + 1, \
+												dtype = np.float64) * timestep
+			self.time = self._map_column('time', f)
+			return
+		elif self.storage == 'array':
+			steps = np.arange(1, self.number_of_measurements + 1, dtype = np.float64)
+			self.time = steps * float(self.timestep)
+			return
+
 		# self.timestep should already be decimal.
 		self.time = [self.timestep]
 
@@ -213,7 +619,15 @@ class Data(object):
 	def create_temperature_in_kelvin(self):
 		# self.in_kelvin is either 1 or 0. Zero will be evaluated as False 
 		# here ... Cool!
-		if not self.in_kelvin and hasattr(self, 'temperature'):
+		if not self.in_kelvin and hasattr(self, 'temperature') and \
+												self.storage == 'memmap':
+			temperature = self.temperature
+			f = lambda this: temperature[this] + 273.15
+			self.temperature = self._map_column('temperature', f)
+		elif not self.in_kelvin and hasattr(self, 'temperature') and \
+												self.storage == 'array':
+			self.temperature = self.temperature + 273.15
+		elif not self.in_kelvin and hasattr(self, 'temperature'):
 			for i in range(len(self.temperature)):
 				self.temperature[i] = self.temperature[i] + dec('273.15')
 		elif not hasattr(self, 'temperature'):
@@ -242,6 +656,13 @@ class Data(object):
 			# This is needed in correct_baseline() as return condition.
 			return False
 
+		# The mean over the last length_for_mean values, same as below.
+		elif self.storage != 'decimal':
+			these_values = self.heat_flow[-max(length_for_mean, 1):]
+			self.steady_state_heat_flow = these_values.mean()
+
+			return True
+
 		else:
 			i = -1
 			self.steady_state_heat_flow = self.heat_flow[i]
@@ -271,15 +692,37 @@ class Data(object):
 				self.baseline_corrected = False
 				return
 
-		# All values in the data-attributes are of type dec().
+		# All values in the data-attributes are of type dec() or all are 
+		# float64 in an array.
 		# I love list comparisons :) .
-		self.heat_flow = [x - self.steady_state_heat_flow for x in self.heat_flow]
+		if self.storage == 'memmap':
+			heat_flow = self.heat_flow
+			steady_state_heat_flow = float(self.steady_state_heat_flow)
+			f = lambda this: heat_flow[this] - steady_state_heat_flow
+			self.heat_flow = self._map_column('heat_flow', f)
+		elif self.storage == 'array':
+			self.heat_flow = self.heat_flow - float(self.steady_state_heat_flow)
+		else:
+			self.heat_flow = [x - self.steady_state_heat_flow for x in self.heat_flow]
 		self.baseline_corrected = True
 
 
 	# The total heat of reaction certainly is an attribute of the data.
 	# Hence the calculation of the same is a class method.
 	def calculate_total_heat_of_reaction(self):
+		# The last value is NOT used, see below.
+		if self.storage == 'memmap':
+			total_heat = 0.0
+			for this in self._chunks(len(self.heat_flow) - 1):
+				total_heat += self.heat_flow[this].sum()
+
+			self.total_heat = round(float(total_heat) * float(self.timestep), 3)
+			return
+		elif self.storage == 'array':
+			total_heat = self.heat_flow[:-1].sum() * float(self.timestep)
+			self.total_heat = round(float(total_heat), 3)
+			return
+
 		# Yes, it is as easy as this ... tihihihi.
 		self.total_heat = dec('0.0')
 		for i in range(len(self.heat_flow) - 1):
@@ -304,6 +747,31 @@ class Data(object):
 		else:
 			self.initial_conversion = deepcopy(initial_conversion)
 
+		# The running sum is the same as the loop below without the need to 
+		# pop() the first value.
+		if self.storage != 'decimal':
+			self.total_heat = float(self.total_heat)
+			self.initial_conversion = float(self.initial_conversion)
+			factor = float(self.timestep) / self.total_heat
+
+		if self.storage == 'memmap':
+			self.conversion = self._new_column('conversion')
+			# The sum of all previous chunks is put in front of each chunk,
+			# thus the running sum is exactly the same as for the whole array.
+			running_sum = 0.0
+			for this in self._chunks():
+				these_values = np.concatenate(([running_sum], self.heat_flow[this]))
+				added_heat = np.cumsum(these_values)[1:]
+				self.conversion[this] = self.initial_conversion + added_heat * factor
+				running_sum = added_heat[-1]
+
+			self.conversion.flush()
+			return
+		elif self.storage == 'array':
+			added_conversion = np.cumsum(self.heat_flow) * factor
+			self.conversion = self.initial_conversion + added_conversion
+			return
+
 		self.conversion = [self.initial_conversion]
 
 		# < - 1 > because the first value is alread set above!
@@ -326,10 +794,18 @@ class Data(object):
 
 	# I need the index of the conversion with the value which is closest to
 	# the steps the user want to calculate the activation energy for.
-	def find_values_for_isoconversion(self):
+	def find_values_for_isoconversion(self, interpolation = None):
 		# ATTENTION: self.conversion_step (without the < s > at the end!) 
 		# has to be det after the data was created but before this method is 
 		# called.
+		conversion_step = self.conversion_step
+
+		# numpy can not work with dec()-numbers, thus these are still 
+		# searched for one after the other.
+		if self.storage != 'decimal':
+			self._find_step_indices(float(conversion_step), interpolation)
+			return
+
 		self.conversion_steps = [self.conversion[0]]
 		self.time_steps = [self.time[0]]
 		self.temperature_steps = [self.temperature[0]]
@@ -339,11 +815,11 @@ class Data(object):
 		# ATTENTION: Don't use a conversion step of zero (or the initial 
 		# conversion) conversion since this will not work with how the heat 
 		# flow values are picked later to determine the integral.
-		next_step = self.conversion_steps[0] + self.conversion_step
+		next_step = self.conversion_steps[0] + conversion_step
 
 		for i in range(len(self.conversion)):
-			# First find the closest actual value of conversion to the desired 
-			# value ...
+			# First find the closest actual value of conversion to the 
+			# desired value ...
 			if self.conversion[i] >= next_step:
 				self.conversion_steps.append(next_step)
 				# ... and use its index to find the corresponding time and 
@@ -351,13 +827,201 @@ class Data(object):
 				self.time_steps.append(self.time[i])
 				self.temperature_steps.append(self.temperature[i])
 				# Then calculate the next step.
-				next_step = self.conversion_steps[-1] + self.conversion_step
+				next_step = self.conversion_steps[-1] + conversion_step
+
+
+	# Does the same as the loop in .find_values_for_isoconversion() but with 
+	# numpy, chunk by chunk: the first sample at which the conversion 
+	# reached a step is where the running maximum of the conversion reaches
+	# it, and the running maximum is sorted, thus np.searchsorted() can find
+	# all steps at once.
+	# The indices of the samples are stored in self.step_indices (the first 
+	# step is always the first sample).
+	# < interpolation > can be None (the values of the found samples are 
+	# used, like it was always done), 'linear' or 'pchip' (the time and 
+	# temperature are interpolated to the exact value of the conversion step,
+	# see ._interpolate_at_steps()).
+	def _find_step_indices(self, conversion_step, interpolation = None):
+		length = len(self.conversion)
+		first_conversion = float(self.conversion[0])
+
+		# nan-values are ignored, like in the loop.
+		largest_conversion = max(np.nanmax(self.conversion[this]) for this in \
+															self._chunks(length))
+
+		# The steps are added up one after the other (cumsum() does just 
+		# that) so that the values are exactly the same as in the loop.
+		# If the first conversion is nan, the loop doesn't find any step.
+		number_of_steps = 0
+		if largest_conversion >= first_conversion:
+			number_of_steps = int((largest_conversion - first_conversion) / \
+														conversion_step) + 2
+		targets = np.cumsum(np.r_[first_conversion, \
+										np.full(number_of_steps, conversion_step)])
+		targets = targets[1:][targets[1:] <= largest_conversion]
+
+		indices = np.full(len(targets), length)
+		running_maximum = -np.inf
+		found = 0
+		for this in self._chunks(length):
+			conversion = np.fmax.accumulate(np.fmax(self.conversion[this], \
+																running_maximum))
+			running_maximum = conversion[-1]
+			positions = np.searchsorted(conversion, targets[found:], side = 'left')
+			positions = positions[positions < len(conversion)]
+			indices[found:(found + len(positions))] = this.start + positions
+			found += len(positions)
+
+		# With interpolation each step is placed between the sample found
+		# here and the one before, which enclose it. Several steps may share
+		# the same two samples if the conversion rose by more than one step
+		# between them.
+		if interpolation:
+			targets = targets[indices < length]
+			self.step_indices = np.r_[0, indices[indices < length]]
+			self.conversion_steps = [first_conversion] + targets.tolist()
+			self.time_steps = self._interpolate_at_steps('time', targets, \
+																interpolation)
+			self.temperature_steps = self._interpolate_at_steps('temperature', \
+														targets, interpolation)
+			return
+
+		# In the loop each sample can be used for just one step, even if the
+		# conversion jumps over several steps at once. The following steps 
+		# are then just one sample later. Also, if it runs out of samples, the
+		# remaining steps are lost.
+		k = np.arange(1, len(targets) + 1)
+		indices = np.maximum(np.maximum.accumulate(indices - k), -1) + k
+
+		# Such a later sample may have a lower conversion than the step (e.g.
+		# due to noise or nan-values). Then the loop uses the next sample 
+		# which reaches the step. These (rare) cases are handled one by one.
+		bad = self._first_below_step(indices, targets, 0)
+		while bad != None:
+			i = self._next_sample_at_step(indices[bad], targets[bad])
+			indices[bad:] = np.maximum(indices[bad:], \
+										i + np.arange(len(indices) - bad))
+			bad = self._first_below_step(indices, targets, bad + 1)
+
+		targets = targets[indices < length]
+		indices = indices[indices < length]
+
+		self.step_indices = np.r_[0, indices]
+		self.conversion_steps = [first_conversion] + targets.tolist()
+		self.time_steps = self.time[self.step_indices].tolist()
+		self.temperature_steps = self.temperature[self.step_indices].tolist()
+
+
+	# Returns the first step from < start > on whose sample in < indices > has 
+	# a lower conversion than the step (< targets >), or None.
+	def _first_below_step(self, indices, targets, start):
+		indices = indices[start:]
+		targets = targets[start:][indices < len(self.conversion)]
+		indices = indices[indices < len(self.conversion)]
+
+		# This is also True for nan-values.
+		below = np.flatnonzero(~(self.conversion[indices] >= targets))
+		if len(below) == 0:
+			return None
+
+		return start + below[0]
+
+
+	# Returns the index of the first sample from < index > on with a 
+	# conversion of at least < target > (the number of samples if there is 
+	# none).
+	def _next_sample_at_step(self, index, target):
+		for this in self._chunks(len(self.conversion)):
+			if this.stop <= index:
+				continue
+			this = slice(max(this.start, index), this.stop)
+			found = np.flatnonzero(self.conversion[this] >= target)
+			if len(found):
+				return this.start + found[0]
+
+		return len(self.conversion)
+
+
+	# Linear interpolation of < variable > to the conversion steps < targets >
+	# between the sample found by ._find_step_indices() and the one before.
+	# The conversion of the found sample is the running maximum, thus the 
+	# step always lies between these two samples. If the one before is a 
+	# nan-value the found sample is used.
+	# With < interpolation > = 'pchip' a monotone cubic (like 
+	# scipy.interpolate.PchipInterpolator) through the two samples before and
+	# after the step is used instead. This is done just where the conversion
+	# rises at all these four samples, everywhere else it stays linear.
+	def _interpolate_at_steps(self, variable, targets, interpolation = 'linear'):
+		last = len(self.conversion) - 1
+		upper = self.step_indices[1:]
+		lower = np.maximum(upper - 1, 0)
+
+		lower_conversion = self.conversion[lower]
+		upper_conversion = self.conversion[upper]
+		step = upper_conversion - lower_conversion
+		with np.errstate(all = 'ignore'):
+			fraction = (targets - lower_conversion) / step
+		fraction = np.where(np.isfinite(fraction), np.clip(fraction, 0.0, 1.0), 1.0)
+
+		values = getattr(self, variable)
+		lower_values = values[lower]
+		upper_values = values[upper]
+		these_values = lower_values + fraction * (upper_values - lower_values)
+
+		if interpolation == 'pchip':
+			before = np.maximum(lower - 1, 0)
+			after = np.minimum(upper + 1, last)
+			step_before = lower_conversion - self.conversion[before]
+			step_after = self.conversion[after] - upper_conversion
+
+			with np.errstate(all = 'ignore'):
+				secant = (upper_values - lower_values) / step
+				secant_before = (lower_values - values[before]) / step_before
+				secant_after = (values[after] - upper_values) / step_after
+				lower_slope = self._pchip_slope(secant_before, secant, \
+															step_before, step)
+				upper_slope = self._pchip_slope(secant, secant_after, \
+															step, step_after)
+
+				# These are the cubic Hermite basis functions.
+				t = fraction
+				cubic = (2*t**3 - 3*t**2 + 1) * lower_values + \
+							(t**3 - 2*t**2 + t) * step * lower_slope + \
+							(-2*t**3 + 3*t**2) * upper_values + \
+							(t**3 - t**2) * step * upper_slope
+
+			rising = (step_before > 0) & (step > 0) & (step_after > 0) & \
+									(lower > before) & (after > upper) & np.isfinite(cubic)
+			these_values = np.where(rising, cubic, these_values)
+
+		return [float(values[0])] + these_values.tolist()
+
+
+	# The slope at a sample for the monotone cubic in ._interpolate_at_steps(),
+	# calculated from the < left > and < right > secant and the length of 
+	# the steps (< left_step >, < right_step >) as Fritsch and Carlson do 
+	# (weighted harmonic mean, zero at extrema).
+	def _pchip_slope(self, left, right, left_step, right_step):
+		left_weight = 2.0 * right_step + left_step
+		right_weight = right_step + 2.0 * left_step
+		slope = (left_weight + right_weight) / (left_weight / left + right_weight / right)
+
+		return np.where(left * right > 0, slope, 0.0)
 
 
 	# The inverse temperature is needed to calculate the compensation 
 	# parameters. Since the temperature is an attribute of the data, it
 	# seems to fit that the inverse temperature is, too.
 	def _calculate_inverse_temperature(self):
+		if self.storage == 'memmap':
+			temperature = self.temperature
+			f = lambda this: -1.0 / (8.314 * temperature[this])
+			self.inverse_temperature = self._map_column('inverse_temperature', f)
+			return
+		elif self.storage == 'array':
+			self.inverse_temperature = -1.0 / (8.314 * self.temperature)
+			return
+
 		R = dec('8.314')
 		self.inverse_temperature = deepcopy(self.temperature)
 		for i in range(len(self.inverse_temperature)):
@@ -366,44 +1030,66 @@ class Data(object):
 
 
 	# More or less dito for the values of a given kinetic model.
+	# All models are calculated for all values at once, see 
+	# kf.all_model_values().
 	def _calculate_kinetic_model_values(self):
-		for model_name, kinetic_function in kf.all_models.items():
-			this = '{}_model_values'.format(model_name)
-			these_values = []
-
-			for conversion in self.conversion:
-				# numpy can not work with dec()-numbers. Thus I have to 
-				# convert to float :( .
-				value = kinetic_function(float(conversion))
-				these_values.append(value)
-
-			setattr(self, this, these_values)
+		model_names = list(kf.all_models.keys())
+
+		if self.storage == 'memmap':
+			columns = [self._new_column('{}_model_values'.format(x)) for x in model_names]
+			for this in self._chunks():
+				values = kf.all_model_values(self.conversion[this])
+				for i in range(len(columns)):
+					columns[i][this] = values[i]
+
+			for i in range(len(columns)):
+				columns[i].flush()
+				setattr(self, '{}_model_values'.format(model_names[i]), columns[i])
+			return
+
+		# numpy can not work with dec()-numbers. Thus I have to 
+		# convert to float :( .
+		values = kf.all_model_values(np.asarray(self.conversion, dtype = np.float64))
+		for i in range(len(model_names)):
+			setattr(self, '{}_model_values'.format(model_names[i]), values[i])
+
+
+	# It is possible that heat_flow / model_value becomes negative. In this 
+	# case the logarithm can NOT be calculated. This will lead to errors and 
+	# this case is handled here by setting these values to nan. However, this 
+	# should just happen towards the very beginning or end of the curing 
+	# process and within the limits of 20 to 80 percent everything should be ok.
+	def _logarithm(self, heat_flow, model_values):
+		with np.errstate(divide = 'ignore', invalid = 'ignore'):
+			values = heat_flow / model_values
+			return np.log(np.where(values > 0.0, values, np.nan))
 
 
 	# Just to keep .calculate_left_hand_side() more tidy.
+	# Returns the values and a mask which is False where the logarithm could 
+	# not be calculated.
 	def _calculate_logarithm(self, model_name):
 		this = '{}_model_values'.format(model_name)
 		model_values = getattr(self, this)
-		these_values = []
-
-		for i in range(len(self.heat_flow)):
-			heat_flow = float(self.heat_flow[i])
-			model_value = model_values[i]
-
-			value = heat_flow / model_value
-			# It is possible that value becomes negative. In this case the 
-			# logarithm can NOT be calculated. This will lead to errors and this
-			# case is handled here. However, this should just happen towards
-			# the very beginning or end of the curing process and within the
-			# limits of 20 to 80 percent everything should be ok.
-			if value <= 0.0:
-				this = '-'
-			else:
-				this = np.log(value)
 
-			these_values.append(this)
+		if self.storage == 'memmap':
+			heat_flow = self.heat_flow
+			f = lambda this: self._logarithm(heat_flow[this], model_values[this])
+			this = '{}_left_hand_side_values'.format(model_name)
+			these_values = self._map_column(this, f)
+
+			f = lambda this: np.isfinite(these_values[this])
+			this = '{}_left_hand_side_valid'.format(model_name)
+			valid = self._map_column(this, f, bool)
+
+			return these_values, valid
 
-		return these_values
+		# numpy can not work with dec()-numbers. Thus I have to 
+		# convert to float :( .
+		heat_flow = np.asarray(self.heat_flow, dtype = np.float64)
+		these_values = self._logarithm(heat_flow, model_values)
+
+		return these_values, np.isfinite(these_values)
 
 
 	# Dito for the left hand side of the equation that leads to the linear
@@ -414,24 +1100,29 @@ class Data(object):
 
 		for model_name in kf.all_models.keys():
 			this = '{}_left_hand_side_values'.format(model_name)
-			these_values = self._calculate_logarithm(model_name)
+			that = '{}_left_hand_side_valid'.format(model_name)
+			these_values, valid = self._calculate_logarithm(model_name)
 
 			setattr(self, this, these_values)
+			setattr(self, that, valid)
 
 
 	# Linear regression shall take place between 20 and 80 percent conversion.
 	# Here I find the indices in self.conversion at which 20 or 80 percent 
 	# conversion are, so that I can use this in _fit_linear_equation_to_all_models().
 	def _find_bounds(self):
+		if self.storage != 'decimal':
+			return self._find_bounds_in_chunks()
+
 		lower_bound = None
 		upper_bound = None
 
 		for i in range(len(self.conversion)):
 			# Yes, I hard code here between which conversion limits the linear
 			# regression shall take place afterwards.
-			if not lower_bound and self.conversion[i] >= dec('0.2'):
+			if lower_bound is None and self.conversion[i] >= dec('0.2'):
 				lower_bound = i
-			if not upper_bound and self.conversion[i] >= dec('0.8'):
+			if upper_bound is None and self.conversion[i] >= dec('0.8'):
 				upper_bound = i
 				# Break at this point to not go through the whole list, which 
 				# may be very long.
@@ -440,27 +1131,72 @@ class Data(object):
 		return lower_bound, upper_bound
 
 
+	# Does the same as the loop in ._find_bounds() with numpy, chunk by 
+	# chunk (like ._find_step_indices()): the first value which reaches a 
+	# bound is where the running maximum of the conversion reaches it.
+	# Memory-mapped data is just read up to the upper bound.
+	def _find_bounds_in_chunks(self):
+		targets = np.array([0.2, 0.8])
+		bounds = [None, None]
+		running_maximum = -np.inf
+
+		for this in self._chunks(len(self.conversion)):
+			conversion = np.fmax.accumulate(np.fmax(self.conversion[this], \
+																running_maximum))
+			running_maximum = conversion[-1]
+			positions = np.searchsorted(conversion, targets, side = 'left')
+			for i in range(len(targets)):
+				if bounds[i] is None and positions[i] < len(conversion):
+					bounds[i] = this.start + int(positions[i])
+
+			if bounds[1] is not None:
+				break
+
+		return bounds[0], bounds[1]
+
+
 	# This function fits the kinetic models between 20 and 80 percent to
 	# figure out the Arrhenius pre-factor and activation energy for each model.
+	# All models are fitted at once, see kf.fit_linear_functions(). The sums 
+	# for the fit are added up CHUNK_SIZE values at a time (see 
+	# kf.linear_sums()), thus there is never more than one chunk per model 
+	# in the memory, no matter how long the data is.
 	def _fit_linear_equation_to_all_models(self):
 		lower_bound, upper_bound = self._find_bounds()
-		all_x_values = self.inverse_temperature
-		x_values = [float(x) for x in all_x_values[lower_bound:(upper_bound + 1)]]
-
-		for model_name in kf.all_models.keys():
-			this = '{}_left_hand_side_values'.format(model_name)
-			all_left_hand_side_values = getattr(self, this)
-			fit_this = all_left_hand_side_values[lower_bound:(upper_bound + 1)]
-			initial_guess = 0.0, 0.0
-
-			result = curve_fit(kf.linear_function, x_values, fit_this, initial_guess)
-			ln_pre_factor = result[0][0]
-			activation_energy = result[0][1]
-
+		model_names = list(kf.all_models.keys())
+
+		sums = 0
+		shift = None
+		for this in self._chunks(upper_bound + 1 - lower_bound):
+			this = slice(this.start + lower_bound, this.stop + lower_bound)
+			x_values = np.asarray(self.inverse_temperature[this], dtype = np.float64)
+
+			# Values for which the logarithm could not be calculated are not 
+			# used.
+			fit_these = np.empty((len(model_names), len(x_values)))
+			use_these = np.empty((len(model_names), len(x_values)), dtype = bool)
+			for i, model_name in enumerate(model_names):
+				this_one = '{}_left_hand_side_values'.format(model_name)
+				that_one = '{}_left_hand_side_valid'.format(model_name)
+				fit_these[i] = getattr(self, this_one)[this]
+				use_these[i] = getattr(self, that_one)[this]
+
+			these_sums, shift = kf.linear_sums(x_values, fit_these, use_these, shift)
+			sums = sums + these_sums
+
+		ln_pre_factors, activation_energies, ln_pre_factor_errors, \
+						activation_energy_errors = kf.fit_from_sums(sums, shift)
+
+		for i, model_name in enumerate(kf.all_models.keys()):
 			this = '{}_ln_pre_factor'.format(model_name)
 			that = '{}_activation_energy'.format(model_name)
-			setattr(self, this, ln_pre_factor)
-			setattr(self, that,activation_energy)
+			setattr(self, this, ln_pre_factors[i])
+			setattr(self, that, activation_energies[i])
+
+			this = '{}_ln_pre_factor_error'.format(model_name)
+			that = '{}_activation_energy_error'.format(model_name)
+			setattr(self, this, ln_pre_factor_errors[i])
+			setattr(self, that, activation_energy_errors[i])
 
 
 	# And finally the linear fit is made through all pairs of pre-factor and
@@ -479,12 +1215,9 @@ class Data(object):
 			
 			all_activation_energies.append(activation_energy)
 			all_ln_pre_factors.append(ln_pre_factor)
-			initial_guess = 0.0, 0.0
 
-		result = curve_fit(kf.linear_function, all_activation_energies, \
-												all_ln_pre_factors, initial_guess)
-		self.a = result[0][0]
-		self.b = result[0][1]
+		self.a, self.b, self.a_error, self.b_error = \
+			kf.fit_linear_functions(all_activation_energies, all_ln_pre_factors)
 
 
 	# See comment to _generate_values_from_file() in class UserFunction() why 
@@ -495,94 +1228,129 @@ class Data(object):
 	# One example of what is done here: I check which value in reference_list
 	# is closest to a value in original_list. Afterwards the corresponding 
 	# value for the parameter of interest is found in values_list and stored.
-	def _get_correct_values_from_file(self, reference_list, original_list, values_list):
-		print("Finding correct values (this may take a while) ...")
-		new_values_list = []
-
-		# I do more or less the same trick as in find_values_for_isoconversion() 
-		# to speed up the process.
-		i = 0
-		j = 0
-		this_value = reference_list[j]
-
-		# Problem: finding the closest element takes a lot of time, unless I do 
-		# the same as in find_values_for_isoconversion(). However, this is 
-		# just meaningful if original_list is considerably longer than 
-		# reference_list. This is the case when I need just some e.g. heat flow 
-		# values to calculate the actual kinetic function and I can use 
-		# _original_longer_reference() where said trick is used.
-		# 
-		# However, when I need to find the corresponding activation energy
-		# values to a more "fine grained" conversion-increment than the 
-		# activation energy file actually has, than this trick would still work, 
-		# but it would not yield the nearest value to a given conversion.
-		# Thus I have implemented a proper way to do it in this case.
-		# Fortunately is the list with the activation energies not assumed to 
-		# be long.
-		# If the the list with activation energies is equally long as 
-		# original list (the conversion increment is equal), the upper case
-		# should work, too. (It doesn't completely, though, see below)
-		if len(original_list) >= len(reference_list):
-			new_values_list = self._original_longer_reference(reference_list, \
-														original_list, values_list)
-		else:
-			new_values_list = self._original_shorter_reference(reference_list, \
-														original_list, values_list)
-
-		# Case three is the opposite of the second case. This is a stupid case.
-		# who would want a coarser grained kinetic function than the activation
-		# energy is calculated for.
-		# Usually I would let thr users run into such things, especially since
-		# these two upper cases took me some nerves to test and implement. 
-		# However, this seems to be fixable in an easy way, because in this case
-		# it seems as if new_values_list is always just one element short.
-		# I just add one element and that solves the occuring errors.
-		while len(new_values_list) < len(reference_list):
-			new_values_list.append(new_values_list[-1])
+	# 
+	# If original_list is considerably longer than reference_list (e.g. when 
+	# I need just some heat flow values to calculate the actual kinetic 
+	# function) the first value which reaches the reference value is used,
+	# like it was always done. If it is shorter (e.g. when I need the 
+	# activation energies for a more "fine grained" conversion-increment than 
+	# the activation energy file actually has) the nearest value is used.
+	# Other ways to find the values can be given with < mode >, see 
+	# ._lookup_values().
+	# The returned list is always exactly as long as reference_list.
+	def _get_correct_values_from_file(self, reference_list, original_list, \
+													values_list, mode = None):
+		self._say("Finding correct values ...")
+
+		if not mode:
+			if len(original_list) >= len(reference_list):
+				mode = 'next'
+			else:
+				mode = 'nearest'
 
-		return new_values_list
+		return self._lookup_values(reference_list, original_list, values_list, mode)
 
 
 	# Just to keep _get_correct_values_from_file() more tidy.
-	# Related to the problem described in _get_correct_values_from_file()
 	# ATTENTION: It is assumed that values_list is equally long as original_list!
 	def _original_longer_reference(self, reference_list, original_list, values_list):
-		new_values_list = []
-		# I do more or less the same trick as in find_values_for_isoconversion() 
-		# to speed up the process.
-		i = 0
-		j = 0
-		this_value = reference_list[j]
-
-		while i < len(original_list):
-			compare_value = original_list[i]
-			if compare_value >= this_value:
-				new_values_list.append(values_list[i])
-				j += 1
-				# There may be no element left in reference_list. Hence, I need
-				# a break condition.
-				if j == len(reference_list):
-					break
-
-				this_value = reference_list[j]
-
-			i += 1
-
-		return new_values_list
+		return self._lookup_values(reference_list, original_list, values_list, 'next')
 
 
 	# Dito
 	# ATTENTION: It is assumed that values_list is equally long as original_list!
 	def _original_shorter_reference(self, reference_list, original_list, values_list):
-		new_values_list = []
-
-		for this_value in reference_list:
-			# I found this a while ago somewhere on the net, and I don't 
-			# remember where. :(
-			this_index = min(range(len(original_list)), key = lambda i: abs(original_list[i] - this_value))
-			new_values_list.append(values_list[this_index])
-
-		return new_values_list
+		return self._lookup_values(reference_list, original_list, values_list, 'nearest')
+
+
+	# For each value in < reference_list > the corresponding value in 
+	# < values_list > is found via < original_list >. Originally this was done
+	# by going through the lists for each value, which takes very long for 
+	# long lists. Now np.searchsorted() finds all values at once. < mode > is
+	# how the values are found:
+	# - 'next': the first value in original_list which is at least the 
+	#   reference value (or the last one, if there is none).
+	# - 'previous': the last value in original_list which is at most the 
+	#   reference value (or the first one, if there is none).
+	# - 'nearest': the nearest value in original_list (the first one of these
+	#   if there are several).
+	# - 'linear': linear interpolation between previous and next.
+	# For all but 'nearest' original_list is assumed to rise (like the 
+	# conversion). Where it doesn't, its running maximum is used.
+	# 'next' and 'previous' go through original_list chunk by chunk (it may 
+	# be memory-mapped, see ._count_below()). 'nearest' and 'linear' need it
+	# as a whole and are just used for short lists.
+	# ATTENTION: It is assumed that values_list is equally long as original_list!
+	# The values keep their type (e.g. dec()-numbers), except for 'linear' 
+	# which returns floats.
+	def _lookup_values(self, reference_list, original_list, values_list, mode = 'nearest'):
+		# As floats because one of the lists may contain dec()-numbers and 
+		# the other float64-values from a numpy-array.
+		reference = np.asarray(reference_list, dtype = np.float64)
+		last = len(original_list) - 1
+
+		if mode == 'next':
+			indices = np.minimum(self._count_below(original_list, reference, \
+																'left'), last)
+			return self._pick_values(values_list, indices)
+		elif mode == 'previous':
+			indices = np.maximum(self._count_below(original_list, reference, \
+															'right') - 1, 0)
+			return self._pick_values(values_list, indices)
+
+		original = np.asarray(original_list, dtype = np.float64)
+
+		if mode == 'nearest':
+			order = np.argsort(original, kind = 'stable')
+			ordered = original[order]
+			upper = np.clip(np.searchsorted(ordered, reference, side = 'left'), 0, last)
+			lower = np.maximum(upper - 1, 0)
+			# The first one of equal values.
+			lower_indices = order[np.searchsorted(ordered, ordered[lower], side = 'left')]
+			upper_indices = order[np.searchsorted(ordered, ordered[upper], side = 'left')]
+			lower_distance = np.abs(reference - ordered[lower])
+			upper_distance = np.abs(ordered[upper] - reference)
+			# If both are equally far away, the one which comes first.
+			use_lower = (lower_distance < upper_distance) | \
+						((lower_distance == upper_distance) & (lower_indices <= upper_indices))
+			indices = np.where(use_lower, lower_indices, upper_indices)
+			return self._pick_values(values_list, indices)
+
+		if mode == 'linear':
+			rising = np.fmax.accumulate(original)
+			values = np.asarray(values_list, dtype = np.float64)
+			# np.interp() needs the first of equal values.
+			first = np.r_[True, rising[1:] > rising[:-1]]
+			return np.interp(reference, rising[first], values[first]).tolist()
+
+		raise ValueError('Unknown mode < {} >.'.format(mode))
+
+
+	# The same as np.searchsorted() of < reference > in the running maximum 
+	# of < original_list >, but CHUNK_SIZE values at a time. The running 
+	# maximum rises, thus the number of values below each reference value can
+	# be counted per chunk and added up. The running maximum of a chunk starts
+	# at the last one of the chunk before.
+	def _count_below(self, original_list, reference, side):
+		counts = np.zeros(len(reference), dtype = np.int64)
+		running_maximum = -np.inf
+
+		for this in self._chunks(len(original_list)):
+			original = np.asarray(original_list[this], dtype = np.float64)
+			rising = np.fmax.accumulate(np.fmax(original, running_maximum))
+			running_maximum = rising[-1]
+			counts += np.searchsorted(rising, reference, side = side)
+
+		return counts
+
+
+	# Just to keep ._lookup_values() more tidy. numpy-arrays can be indexed 
+	# with all indices at once, lists can not.
+	def _pick_values(self, values_list, indices):
+		if isinstance(values_list, np.ndarray):
+			return values_list[indices].tolist()
+
+		return [values_list[i] for i in indices]
 
 
 # For the kinetic function or the actual kinetic function, the user shall
@@ -829,14 +1597,120 @@ class UserFunction(Data):
 
 
 
+# The values of a UserFunction() as plain floats, so that the value for a 
+# given conversion can be found quickly (by bisection) as often as needed. 
+# Like in ._original_longer_reference() the value of the first conversion 
+# step which is at least the given conversion is used (or the last one).
+class LookupTable(object):
+	def __init__(self, user_function):
+		# bisect needs a list which doesn't go down.
+		self.conversion = np.fmax.accumulate(np.asarray(user_function.conversion, \
+															dtype = np.float64)).tolist()
+		self.values = np.asarray(user_function.values, dtype = np.float64).tolist()
+		self.last = len(self.values) - 1
+		# The same as arrays for .values_at().
+		self.conversion_array = np.array(self.conversion)
+		self.values_array = np.array(self.values)
+
+
+	def value(self, conversion):
+		i = bisect.bisect_left(self.conversion, conversion)
+
+		return self.values[min(i, self.last)]
+
+
+	# The same as .value() for all elements of < conversion > at once.
+	def values_at(self, conversion):
+		i = np.minimum(np.searchsorted(self.conversion_array, conversion, \
+													side = 'left'), self.last)
+
+		return self.values_array[i]
+
+
+
+
+
+
+# A temperature program (e.g. of a cure cycle) which consists of segments, 
+# one after the other. Each segment is a linear ramp to a new temperature 
+# (heating or cooling) or holds the temperature for some time. 
+# Between these points in time the temperature is linearly interpolated.
+class TemperatureProgram(object):
+	def __init__(self, start_temperature):
+		self.times = [0.0]
+		self.temperatures = [float(start_temperature)]
+
+
+	# < ramp > is in Kelvin per SECOND and always positive, also for cooling.
+	def add_ramp(self, end_temperature, ramp):
+		end_temperature = float(end_temperature)
+		duration = abs(end_temperature - self.temperatures[-1]) / float(ramp)
+
+		self.times.append(self.times[-1] + duration)
+		self.temperatures.append(end_temperature)
+
+
+	def add_hold(self, duration):
+		self.times.append(self.times[-1] + float(duration))
+		self.temperatures.append(self.temperatures[-1])
+
+
+	def duration(self):
+		return self.times[-1]
+
+
+	# < time > can be a number or a numpy-array. After the end of the program
+	# the last temperature is kept.
+	def temperature_at(self, time):
+		return np.interp(time, self.times, self.temperatures)
+
+
+
+
+
+# The predicted values of time, temperature, conversion and heat flow. 
+# Instead of four lists which grow by one element per timestep (each element 
+# a python float of about 100 bytes with all what belongs to it) these are 
+# written into one array with 32 bytes per timestep. If the array is full, 
+# its size is doubled.
+class TrajectoryBuffer(object):
+	def __init__(self, size):
+		self.values = np.empty((max(int(size), 1), 4))
+		self.length = 0
+
+
+	def append(self, time, temperature, conversion, heat_flow):
+		if self.length == len(self.values):
+			self.values = np.concatenate((self.values, np.empty_like(self.values)))
+
+		self.values[self.length] = time, temperature, conversion, heat_flow
+		self.length += 1
+
+
+	# Returns time, temperature, conversion and heat flow as separate arrays,
+	# without the unused rest of the buffer.
+	def columns(self):
+		values = self.values[:self.length]
+		self.values = None
+
+		return [values[:, i].copy() for i in range(4)]
+
+
+
+
+
 # It was convenient to have this. However, it is instantiated with just the
 # bare minimum of parameters and more attributes will be added to it manually.
 class Prediction(Data):
 	# < isothermal > is True or False. I don't really need it 
 	# (end_temperature) could serve this function. But it is convenient to have.
 	# For an isothermal prediction, start_temperature will be the only temperature.
+	# If a < temperature_program > (see class TemperatureProgram()) is given, 
+	# the temperature follows it instead of < ramp > and the prediction
+	# stops at its end (or when the conversion is complete).
 	def __init__(self, timestep, timeframe, isothermal, start_temperature, \
-								end_temperature, ramp, total_heat, initial_conversion):
+								end_temperature, ramp, total_heat, initial_conversion, \
+													temperature_program = None):
 		# I do NOT do it like in class UserFunction() because I do NOT want to
 		# call the __init__ of class Data(), since I don't have the necessary 
 		# information. However, I want to use at least one method of this class
@@ -857,58 +1731,100 @@ class Prediction(Data):
 		self.pre_factors = None
 		self.kinetic_function = None
 		self.heat_flow = [0]
+		self.temperature_program = temperature_program
+		if temperature_program:
+			self.start_temperature = temperature_program.temperatures[0]
+			self.end_temperature = temperature_program.temperatures[-1]
+			self.temperature = [self.start_temperature]
 
 
 	# Just to keep predict() more tidy.
 	# Well, the name is a bit misleading, since it will also return True when
 	# the time is up
 	def fully_cured(self):
-		if not self.isothermal:
-			this = (self.temperature[-1] >= self.end_temperature) or \
-											(self.time[-1] >= self.timeframe)
+		return self._stop(self.time[-1], self.conversion[-1], self.temperature[-1])
+
+
+	# Dito, for the given values.
+	def _stop(self, time, conversion, temperature):
+		if self.temperature_program:
+			end_time = min(float(self.timeframe), self.temperature_program.duration())
+			this = (time >= end_time) or (conversion >= 0.99999)
+		elif not self.isothermal:
+			this = (temperature >= self.end_temperature) or (time >= self.timeframe)
 		else:
-			this = (self.time[-1] >= self.timeframe) or (self.conversion[-1] >= 0.99999)
+			this = (time >= self.timeframe) or (conversion >= 0.99999)
 
 		return this
 
 
+	# The time after which the prediction will stop at the latest. Needed to 
+	# know how much memory is needed.
+	def _latest_end_time(self):
+		end_time = float(self.timeframe)
+		if self.temperature_program:
+			end_time = min(end_time, self.temperature_program.duration())
+		elif not self.isothermal and self.ramp > 0:
+			end_time = min(end_time, (self.end_temperature - self.start_temperature) / \
+																	self.ramp)
+
+		return max(end_time, 0.0)
+
+
+
+	# < engine > is 'euler' (fixed timesteps, like it was always done) or 'ode'
+	# (see ._predict_ode()).
+	# < keep_every > means that just every so many timesteps (and the last 
+	# one) are kept in the results, to save memory for long predictions with
+	# small timesteps. 
+	# The results are numpy-arrays.
+	def predict(self, engine = 'euler', keep_every = 1):
+		if engine == 'ode':
+			self._predict_ode(keep_every)
+			return
 
-	def predict(self):
 		print("Calculating the heat flow. ATTENTION: This will take some time ...")
 		R = 8.314
+
+		# The values are looked up in tables which are created just once. 
+		# Originally the lists were searched in each step, which became 
+		# slower and slower over time.
+		activation_energy_table = LookupTable(self.activation_energy)
+		pre_factor_table = LookupTable(self.pre_factor)
+		kinetic_function_table = LookupTable(self.kinetic_function)
+
+		size = self._latest_end_time() / self.timestep / keep_every + 2
+		trajectory = TrajectoryBuffer(min(size, BUFFER_SIZE))
+
+		time = self.time[-1]
+		temperature = self.temperature[-1]
+		conversion = self.conversion[-1]
+		heat_flow = self.heat_flow[-1]
+		trajectory.append(time, temperature, conversion, heat_flow)
+
 		i = 0
-		while not self.fully_cured():
+		while not self._stop(time, conversion, temperature):
 			i += 1
-			temperature = self.temperature[-1]
-			conversion = self.conversion[-1]
-
-			# I use _original_longer_reference() since it returns the
-			# truly closest value. See comment in _get_correct_values_from_file().
-			# Don't forget that all parameters need to be lists.
-			activation_energy = float(self._original_longer_reference([conversion], \
-											self.activation_energy.conversion, \
-												self.activation_energy.values)[0])
-			pre_factor = float(self._original_longer_reference([conversion], \
-											self.pre_factor.conversion, \
-												self.pre_factor.values)[0])
-			kinetic_function = float(self._original_longer_reference([conversion], \
-											self.kinetic_function.conversion, \
-												self.kinetic_function.values)[0])
+			activation_energy = activation_energy_table.value(conversion)
+			pre_factor = pre_factor_table.value(conversion)
+			kinetic_function = kinetic_function_table.value(conversion)
 
 			Arrhenius = pre_factor * np.exp(-activation_energy / R / temperature)
 
 			heat_flow = Arrhenius * kinetic_function
-			self.heat_flow.append(heat_flow)
 
 			conversion_change = heat_flow / self.total_heat * self.timestep
 			conversion += conversion_change
-			self.conversion.append(conversion)
 
-			temperature += self.ramp * self.timestep
-			self.temperature.append(temperature)
+			time = time + self.timestep
+
+			if self.temperature_program:
+				temperature = float(self.temperature_program.temperature_at(time))
+			else:
+				temperature += self.ramp * self.timestep
 
-			time = self.time[-1] + self.timestep
-			self.time.append(time)
+			if i % keep_every == 0:
+				trajectory.append(time, temperature, conversion, heat_flow)
 
 			# Just to let the user know how far the process came since this may
 			# take some time.
@@ -917,93 +1833,277 @@ class Prediction(Data):
 														self.timeframe, conversion)
 				print(this)
 
-				# I apologize for the lengthy comment.
-				# 
-				# Problem: if small timesteps are used and long timeframes
-				# will this while-loop be called very often and it turned out 
-				# that it gets considerable slower over time (rather extrem).
-				# 
-				# Initially I thought it is because of appending to the lists. 
-				# This because I thought that finding the minimum in a list to 
-				# a given conversion value (that is what takes place in 
-				# self._original_longer_reference()) takes always the same time 
-				# if the length of the list doesn't change, the only thing
-				# that changes is the length of the lists I append to and the web 
-				# suggested that it may be the appending itself.
-				# 
-				# However, the latter WAS a problem in python 2, but this here
-				# runs in python 3 where this problem was fixed.
-				# Also, using cProfiler revealed that appending to the list was
-				# NOT the bottleneck.
-				# 
-				# So I tried other suggestions and in the end it turned out
-				# that it actually was somewhere inside _original_longer_reference()
-				# that got slower over time. So the thing I ruled out before was 
-				# the culprit.
-				# The only thing that differs in this function with progressing 
-				# conversion is that matching values are found LATER in the list 
-				# of which the minimum is to be found from. I can't imagine why 
-				# this should slow down, since I would think that the whole list 
-				# has to be searched for the minimum anyway, but it does.
-				# 
-				# Solution: The list is ordered and I don't need previous 
-				# values for this application. Thus I simply shorten the lists 
-				# which are used to find the necessary parameters, every 1000 
-				# iterations. 
-				# 
-				# The following lines made the algorithm ca. 100 times faster 
-				# than it is without these.
-				# And for once I came up with the idea all by myself :) .
+		# The last timestep is always kept.
+		if i % keep_every != 0:
+			trajectory.append(time, temperature, conversion, heat_flow)
 
-				# The .conversion-attributes which are used below are 
-				# dec()-numbers. It is not possible to do math with dec()-numbers
-				# and float-values.
-				conversion = dec(conversion)
+		self.time, self.temperature, self.conversion, self.heat_flow = \
+															trajectory.columns()
 
-				f = lambda i: abs(self.activation_energy.conversion[i] - conversion)
-				# Find the index of te minimum ...
-				this_index = min(range(len(self.activation_energy.conversion)), key = f)
-				# Don't do the following, if the index is zero, since I subtract
-				# one from this_index and I this would become < -1 > as argument
-				# for how to slice the lists and this would mess everthing up!
-				if this_index != 0:
-					# ... and cut everything before this index (minus 1) from 
-					# the lists. The minus one just in case if a real conversion
-					# value get's a bit smaller due to rounding errors or
-					# whatever and needs the previous value.
-					self.activation_energy.conversion = self.activation_energy.conversion[(this_index - 1):]
-					self.activation_energy.values = self.activation_energy.values[(this_index - 1):]
 
-				f = lambda i: abs(self.pre_factor.conversion[i] - conversion)
-				this_index = min(range(len(self.pre_factor.conversion)), key = f)
-				if this_index != 0:
-					self.pre_factor.conversion = self.pre_factor.conversion[(this_index - 1):]
-					self.pre_factor.values = self.pre_factor.values[(this_index - 1):]
+	# Instead of going forward with fixed timesteps, scipy's solve_ivp() 
+	# integrates 
+	# 
+	# d(conversion)/dt = A(conversion) * exp(-E(conversion)/RT(t)) * f(conversion) / total_heat
+	# 
+	# with adaptive steps, which needs far less steps for the same accuracy.
+	# It stops at the same conditions as .fully_cured(). The result is then 
+	# written out for the timesteps given by the user (and the exact point in 
+	# time when it stopped), see .predict() regarding < keep_every >.
+	# The activation energy, pre-factor and kinetic function are steps, like 
+	# in .predict() (see LookupTable.value()). The solver would need very 
+	# small steps at each jump, thus it integrates from one conversion value
+	# of the files to the next, in which the values don't change, see 
+	# ._ode_pieces(). Hence, the result is what .predict() yields for very
+	# small timesteps.
+	def _predict_ode(self, keep_every = 1):
+		print("Calculating the heat flow ...")
+		R = 8.314
+
+		tables = [LookupTable(self.activation_energy), LookupTable(self.pre_factor), \
+										LookupTable(self.kinetic_function)]
+		activation_energy_table, pre_factor_table, kinetic_function_table = tables
+
+		if self.fully_cured():
+			return
+
+		end_time = float(self.timeframe)
+		if self.temperature_program:
+			end_time = min(end_time, self.temperature_program.duration())
+
+		pieces = list(self._ode_pieces(tables, end_time))
+
+		end_time = pieces[-1][1]
+		time = np.arange(0.0, end_time, self.timestep * keep_every)
+		if end_time > time[-1]:
+			time = np.r_[time, end_time]
+
+		# The times are in order, thus each piece has the times between 
+		# where it starts and where it ends.
+		conversion = np.empty(len(time))
+		ends = np.searchsorted(time, [x[1] for x in pieces], side = 'right')
+		ends[-1] = len(time)
+		start = 0
+		for (_, _, solution), end in zip(pieces, ends):
+			if end > start:
+				conversion[start:end] = solution(time[start:end])[0]
+				start = end
+
+		temperature = self._temperature_at(time)
+		heat_flow = pre_factor_table.values_at(conversion) * \
+						np.exp(-activation_energy_table.values_at(conversion) / R / temperature) * \
+									kinetic_function_table.values_at(conversion)
+
+		self.time = time
+		self.conversion = conversion
+		self.temperature = temperature
+		self.heat_flow = heat_flow
+
+		this = 'Done after {} s with {} steps of the solver; '.format(end_time, \
+																self.solver_steps)
+		that = 'conversion = {}'.format(self.conversion[-1])
+		print(this + that)
+
+
+	# Just for ._predict_ode(). < time > can be a number or a numpy-array.
+	def _temperature_at(self, time):
+		if self.temperature_program:
+			return self.temperature_program.temperature_at(time)
+
+		return self.start_temperature + self.ramp * time
+
+
+	# Yields the start, the end and the solution (see solve_ivp() regarding
+	# < dense_output >) for each part of the prediction in which the activation energy, 
+	# pre-factor and kinetic function don't change. 
+	# These change at the conversion values of the < tables > (all of them 
+	# together). LookupTable.value() uses for a conversion between two of 
+	# these the values at the upper one. Thus the heat flow just depends on 
+	# the temperature until the conversion reaches the next of these values
+	# (or the one before, if the heat flow is negative), where the next piece
+	# starts.
+	def _ode_pieces(self, tables, end_time):
+		R = 8.314
+		breakpoints = np.unique(np.concatenate([x.conversion_array for x in tables]))
 
-				f = lambda i: abs(self.kinetic_function.conversion[i] - conversion)
-				this_index = min(range(len(self.kinetic_function.conversion)), key = f)
-				if this_index != 0:
-					self.kinetic_function.conversion = self.kinetic_function.conversion[(this_index - 1):]
-					self.kinetic_function.values = self.kinetic_function.values[(this_index - 1):]
+		# These are the stop conditions of .fully_cured(), except for the time.
+		def end_temperature_reached(time, conversion):
+			return self._temperature_at(time) - self.end_temperature
 
+		def fully_converted(time, conversion):
+			return conversion[0] - 0.99999
+
+		end_temperature_reached.terminal = True
+		end_temperature_reached.direction = 1
+		fully_converted.terminal = True
+		fully_converted.direction = 1
+
+		if self.temperature_program or self.isothermal:
+			stop_events = [fully_converted]
+		else:
+			stop_events = [end_temperature_reached]
+
+		time = 0.0
+		conversion = self.initial_conversion
+		# The index of the next conversion value. The piece is between the 
+		# one before and this one.
+		upper = int(np.searchsorted(breakpoints, conversion, side = 'left'))
+		self.solver_steps = 0
+
+		while True:
+			if upper < len(breakpoints):
+				activation_energy, pre_factor, kinetic_function = \
+									[x.value(breakpoints[upper]) for x in tables]
+			else:
+				activation_energy, pre_factor, kinetic_function = \
+										[x.values[-1] for x in tables]
+			factor = pre_factor * kinetic_function / self.total_heat
+
+			# Exactly at the conversion value the piece above is used, like
+			# .predict() does after one timestep.
+			if factor > 0 and upper < len(breakpoints) and \
+											conversion == breakpoints[upper]:
+				upper += 1
+				continue
+
+			def change(time, this_conversion):
+				return [factor * np.exp(-activation_energy / R / self._temperature_at(time))]
+
+			def next_value_reached(time, this_conversion):
+				return this_conversion[0] - breakpoints[upper]
+
+			def previous_value_reached(time, this_conversion):
+				return this_conversion[0] - breakpoints[upper - 1]
+
+			next_value_reached.terminal = True
+			next_value_reached.direction = 1
+			previous_value_reached.terminal = True
+			previous_value_reached.direction = -1
+
+			events = list(stop_events)
+			if factor > 0 and upper < len(breakpoints):
+				events.append(next_value_reached)
+			elif factor < 0 and upper > 0:
+				events.append(previous_value_reached)
+
+			solution = integrate.solve_ivp(change, (time, end_time), [conversion], \
+							method = 'LSODA', events = events, dense_output = True, \
+													rtol = 1e-8, atol = 1e-12)
+			self.solver_steps += solution.t.size - 1
+			last_time = solution.t[-1]
+			yield time, last_time, solution.sol
+
+			# Stopped because the time is up or a stop condition is reached.
+			stopped = any(len(x) for x in solution.t_events[:len(stop_events)])
+			if solution.status != 1 or stopped or last_time >= end_time:
+				return
 
+			time = last_time
+			if factor > 0:
+				conversion = breakpoints[upper]
+				upper += 1
+			else:
+				upper -= 1
+				conversion = breakpoints[upper]
 
 
 
 
 
+# Predicts the heat flow for many scenarios (e.g. a grid of ramps and 
+# isothermals) at once. Each scenario is a Prediction() object with its own
+# temperatures, timeframe and initial conversion. All of these advance 
+# together with the same timestep, as numpy-arrays with one value per 
+# scenario, thus a timestep costs about the same for all scenarios as for 
+# one. The results are exactly what Prediction.predict() (with fixed 
+# timesteps) yields for each scenario and are stored in the scenarios.
+# ATTENTION: The activation energy, pre-factor and kinetic function are the
+# same for all scenarios and are attributes of this object, not of the 
+# scenarios. The same is true for the timestep and the total heat.
+class BatchPrediction(object):
+	def __init__(self, scenarios):
+		self.scenarios = scenarios
+		self.timestep = scenarios[0].timestep
+		self.total_heat = scenarios[0].total_heat
+		self.activation_energy = None
+		self.pre_factor = None
+		self.kinetic_function = None
 
 
+	# The same as Prediction.fully_cured() for all scenarios at once.
+	def _fully_cured(self, time, conversion, temperature):
+		ramp_done = (temperature >= self.end_temperature) | (time >= self.timeframe)
+		isothermal_done = (time >= self.timeframe) | (conversion >= 0.99999)
 
+		return np.where(self.isothermal, isothermal_done, ramp_done)
 
 
+	def predict(self):
+		print("Calculating the heat flow of {} scenarios ...".format(len(self.scenarios)))
+		R = 8.314
 
+		activation_energy_table = LookupTable(self.activation_energy)
+		pre_factor_table = LookupTable(self.pre_factor)
+		kinetic_function_table = LookupTable(self.kinetic_function)
 
+		self.isothermal = np.array([x.isothermal for x in self.scenarios], dtype = bool)
+		self.end_temperature = np.array([x.end_temperature for x in self.scenarios])
+		self.timeframe = np.array([float(x.timeframe) for x in self.scenarios])
+		ramp = np.array([x.ramp for x in self.scenarios])
 
+		conversion = np.array([x.initial_conversion for x in self.scenarios])
+		temperature = np.array([x.start_temperature for x in self.scenarios])
+		time = 0.0
 
+		# One array per timestep with the values of all scenarios.
+		all_conversions = [conversion]
+		all_temperatures = [temperature]
+		all_heat_flows = [np.zeros(len(self.scenarios))]
+		all_times = [time]
 
+		running = ~self._fully_cured(time, conversion, temperature)
+		lengths = np.ones(len(self.scenarios), dtype = int)
 
+		i = 0
+		while running.any():
+			i += 1
+			activation_energy = activation_energy_table.values_at(conversion)
+			pre_factor = pre_factor_table.values_at(conversion)
+			kinetic_function = kinetic_function_table.values_at(conversion)
 
+			Arrhenius = pre_factor * np.exp(-activation_energy / R / temperature)
 
+			heat_flow = Arrhenius * kinetic_function
 
+			# Scenarios which are done don't change anymore.
+			conversion_change = heat_flow / self.total_heat * self.timestep
+			conversion = np.where(running, conversion + conversion_change, conversion)
+			temperature = np.where(running, temperature + ramp * self.timestep, \
+																	temperature)
+			time = time + self.timestep
+
+			all_conversions.append(conversion)
+			all_temperatures.append(temperature)
+			all_heat_flows.append(heat_flow)
+			all_times.append(time)
+
+			lengths += running
+			running &= ~self._fully_cured(time, conversion, temperature)
+
+			if i % 10000 == 0:
+				this = 'At time {} s; {} scenarios of {} '.format(time, \
+											running.sum(), len(self.scenarios))
+				that = 'are still running.'
+				print(this + that)
+
+		all_conversions = np.array(all_conversions)
+		all_temperatures = np.array(all_temperatures)
+		all_heat_flows = np.array(all_heat_flows)
+
+		for j, scenario in enumerate(self.scenarios):
+			length = lengths[j]
+			scenario.time = all_times[:length]
+			scenario.conversion = all_conversions[:length, j].tolist()
+			scenario.temperature = all_temperatures[:length, j].tolist()
+			scenario.heat_flow = [0] + all_heat_flows[1:length, j].tolist()
 
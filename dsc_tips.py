@@ -189,8 +189,9 @@ III - The programs
 10.: prediction.py
 - When the parameters are determined the heat flow of a DSC experiment can be calculated.
 - This is what happens when < prediction.py > is called. The result will be saved in a new file.
-- Isothermals and ramps can be predicted but just one at a time.
-  If an experiment consists of a ramp followed by an isothermal, first the ramp has to be predicted. At the end of the ramp the conversion will have reached a certain value. This value has to be used as initial conversion for the isothermal step.
+- An isothermal (I), a linear temperature ramp (R) or a temperature program (P) can be predicted.
+- A temperature program consists of several segments, one after the other (e.g. a cure cycle with a ramp followed by an isothermal). Each segment either heats or cools to a given temperature with a given ramp or holds the temperature for some time. The whole program is predicted in one run and the conversion is carried over from one segment to the next.
+- Many isothermals and ramps (e.g. for process windows) can be predicted at once from a table of scenarios. Each line of the table is one scenario (name, start temperature, end temperature, ramp, timeframe, initial conversion).
 
 
 I wish fun with using this program.
@@ -38,6 +38,8 @@ from copy import deepcopy
 import os
 import numpy as np
 import kinetic_functions as kf
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## 
 ## ## ## ## ## ## ##                            ## ## ## ## ## ## ## 
@@ -101,6 +103,99 @@ def create_table_header(new_data):
 
 
 
+# All files use the same activation energy and pre-factor tables. Each 
+# process gets these just once when it is started (and not with every file) 
+# and stores them here. On systems that fork new processes these are not 
+# even copied, but inherited from the main process.
+# Just the lists with the values are used, since the UserFunction() objects
+# may contain a function that can not be given to another process.
+worker_tables = {}
+
+def initialize_worker(conversion, activation_energies, pre_factors):
+	worker_tables['conversion'] = conversion
+	worker_tables['activation_energies'] = activation_energies
+	worker_tables['pre_factors'] = pre_factors
+
+
+
+# Everything that is done for one file: calculate the conversion, pick the 
+# values at the conversion steps of the activation energy, calculate the 
+# kinetic function and write it to a file. The files are independent of 
+# each other, thus this function can run in a separate process for each file.
+# initialize_worker() must have been called before (also if just one process
+# is used).
+# < verbose > is False if several files are processed at the same time, 
+# otherwise the messages of all processes would be mixed up.
+def process_file(filename, path, timestep, in_kelvin, total_heat, \
+									initial_conversion, verbose = True):
+	# Just to keep the lines below short.
+	say = print if verbose else lambda *text: None
+	conversion = worker_tables['conversion']
+
+	say("\nWorking on {} ...".format(filename))
+	storage = af.choose_storage(path + filename)
+	data = cd.Data(timestep, path + filename, storage, cache = True, \
+													verbose = verbose)
+
+
+	data.in_kelvin = in_kelvin
+	if not in_kelvin:
+		say("Setting temperature to Kelvin ...")
+	# create_temperature_in_kelvin() will be called even if the temperature
+	# is already in Kelvin, because it contains a check if the data 
+	# actually has temperature data. This is just a check, which is probably
+	# not necessary.
+	data.create_temperature_in_kelvin()
+
+
+	if not total_heat:
+		say("Calculating total heat of reaction ...")
+		data.calculate_total_heat_of_reaction()
+	else:
+		data.total_heat = deepcopy(total_heat)
+
+
+	say("Calculating the conversion ...")
+	data.calculate_conversion(total_heat, initial_conversion)
+
+	# I need of course just the heat flow values for the given conversion
+	# steps.
+	data.heat_flow = data._get_correct_values_from_file(conversion, \
+														data.conversion, data.heat_flow)
+
+	# Dito for the temperature.
+	data.temperature = data._get_correct_values_from_file(conversion, \
+														data.conversion, data.temperature)
+
+	# And finally just the necessary conversion steps.
+	data.conversion = conversion
+
+	data.activation_energy = worker_tables['activation_energies']
+	data.pre_factor = worker_tables['pre_factors']
+
+
+	# This is what I'm here for.
+	calculate_kinetic_function(data)
+
+
+	outfile_name = '000_actual_kinetic_function_{}'.format(filename)
+	#print("Writing calculated values to a file ...")
+	outfile = path + outfile_name
+
+
+	order_of_variables = create_table_header(data)
+	af.write_to_file(outfile, data, order_of_variables)
+
+	# For very long files the calculated values take up a lot of disk space.
+	data.remove_derived_columns()
+
+	say()
+
+	if not verbose:
+		print("Finished {} .".format(filename))
+
+
+
 def main():
 	print("""\n\nCalculating the actual kinetic function.\n
 ATTENTION: It is assumed that the input-files ran through the "step_separator"-program.
@@ -140,6 +235,7 @@ And (if it applies) the file with the conversion dependent activation energy.
 
 
 	conversion_step = af.get_user_input('conversion_step')
+	workers = af.get_user_input('workers')
 
 
 	print('\nRegarding the activation energy:')
@@ -162,69 +258,33 @@ And (if it applies) the file with the conversion dependent activation energy.
 	# program creates these are taken out from the list with the filenames
 	# in the folder. This is the reason why the outfile_name(s) are hard coded. 
 	# Over many runs it turned out that this is a good thing to do.
+	# The folder with the cached data (if any) is excluded, too.
 	filenames = [x for x in os.listdir(path) if ('0000_calculated' not in x.lower() and \
 												'0001_calculated' not in x.lower()) and \
 												'00000_activation' not in x.lower() and \
 												'00000_compensation' not in x.lower() and \
-											'000_actual_kinetic_function' not in x.lower()]
+											'000_actual_kinetic_function' not in x.lower() and \
+										x != cd.CACHE_FOLDER]
 
 	print('')
 
 
-	for filename in filenames:
-		print("\nWorking on {} ...".format(filename))
-		data = cd.Data(timestep, path + filename)
-
-
-		data.in_kelvin = in_kelvin
-		if not in_kelvin:
-			print("Setting temperature to Kelvin ...")
-		# create_temperature_in_kelvin() will be called even if the temperature
-		# is already in Kelvin, because it contains a check if the data 
-		# actually has temperature data. This is just a check, which is probably
-		# not necessary.
-		data.create_temperature_in_kelvin()
-
-
-		if not total_heat:
-			print("Calculating total heat of reaction ...")
-			data.calculate_total_heat_of_reaction()
-		else:
-			data.total_heat = deepcopy(total_heat)
-
-
-		print("Calculating the conversion ...")
-		data.calculate_conversion(total_heat, initial_conversion)
-
-		# I need of course just the heat flow values for the given conversion
-		# steps.
-		data.heat_flow = data._get_correct_values_from_file(activation_energy.conversion, \
-															data.conversion, data.heat_flow)
-
-		# Dito for the temperature.
-		data.temperature = data._get_correct_values_from_file(activation_energy.conversion, \
-															data.conversion, data.temperature)
-
-		# And finally just the necessary conversion steps.
-		data.conversion = activation_energy.conversion
-
-		data.activation_energy = activation_energy.values
-		data.pre_factor = pre_factors.values
-
-
-		# This is what I'm here for.
-		calculate_kinetic_function(data)
-
-
-		outfile_name = '000_actual_kinetic_function_{}'.format(filename)
-		#print("Writing calculated values to a file ...")
-		outfile = path + outfile_name
-
-
-		order_of_variables = create_table_header(data)
-		af.write_to_file(outfile, data, order_of_variables)
+	tables = (activation_energy.conversion, activation_energy.values, \
+														pre_factors.values)
 
+	if workers > 1:
+		print("Working on {} files with {} processes ...".format(len(filenames), workers))
+		with ProcessPoolExecutor(max_workers = workers, initializer = initialize_worker, \
+												initargs = tables) as executor:
+			list(executor.map(process_file, filenames, repeat(path), \
+								repeat(timestep), repeat(in_kelvin), repeat(total_heat), \
+										repeat(initial_conversion), repeat(False)))
 		print()
+	else:
+		initialize_worker(*tables)
+		for filename in filenames:
+			process_file(filename, path, timestep, in_kelvin, total_heat, \
+															initial_conversion)
 
 
 	this = 'Many new files were created in the stated folder containing the '
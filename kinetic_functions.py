@@ -23,11 +23,12 @@ import numpy as np
 # Due to noise can the conversion be (slightly) larger than one or for some 
 # measurement points or (in principle) smaller than zero.
 # This will lead to errors for certain models and this function takes care of it.
+# All functions in here work with single values and with numpy-arrays (all 
+# values at once).
 def avoid_bad_conversion(conversion):
-	if conversion <= 0.0:
-		conversion = 0.00000001
-	elif conversion >= 1.0:
-		conversion = 0.99999999
+	conversion = np.asarray(conversion, dtype = np.float64)
+	conversion = np.where(conversion <= 0.0, 0.00000001, conversion)
+	conversion = np.where(conversion >= 1.0, 0.99999999, conversion)
 
 	return conversion
 
@@ -149,12 +150,98 @@ all_models = {'FO':FO, 'SO':SO, 'AUTO_12':AUTO_12, 'AUTO_21':AUTO_21, \
 				'P4':P4, 'R2':R2, 'R3':R3}
 
 
+# Returns the values of all models for < conversion > (a single value or an
+# array) as array with one row per model, in the order of all_models.
+def all_model_values(conversion):
+	conversion = np.asarray(conversion, dtype = np.float64)
+	values = np.empty((len(all_models),) + conversion.shape)
+
+	for i, kinetic_function in enumerate(all_models.values()):
+		values[i] = kinetic_function(conversion)
+
+	return values
+
+
 # This is not really a kinetic model function, but it is a function and thus
 # I placed it here.
 def linear_function(x_values, y_intercept, slope):
 	return y_intercept + slope * x_values
 
 
+# Fits linear_function() to each row of < y_values > at once. This is plain
+# linear regression (least squares), which has an exact solution, thus no 
+# iterative fitting (like curve_fit()) is needed.
+# < x_values > can be one row (the same for all rows of < y_values >) or 
+# have the same shape as < y_values >. nan-values in < y_values > are not 
+# used, and neither are values for which < mask > (same shape as 
+# < y_values >) is False. Thus each row may use other points.
+# Returns the y-intercepts, slopes and their standard errors, one per row 
+# (or single values if < y_values > is just one row).
+# For data which shall not be in the memory at once, see linear_sums().
+def fit_linear_functions(x_values, y_values, mask = None):
+	sums, shift = linear_sums(x_values, y_values, mask)
+
+	return fit_from_sums(sums, shift)
+
+
+# The sums which are needed for fit_linear_functions() (number of used 
+# points and the sums of x, y, x*x, x*y and y*y), as one array with these
+# six values for each row. The sums of several parts of the data can be 
+# added up, thus the data can be fitted e.g. chunk by chunk.
+# The values < shift > = (x, y) are subtracted before the sums are 
+# calculated, otherwise the precision is lost for e.g. the inverse 
+# temperature which changes just a little. If not given, the mean values of
+# the used points are taken. The same < shift > has to be used for all 
+# parts of the data, thus it is returned as well.
+def linear_sums(x_values, y_values, mask = None, shift = None):
+	y_values = np.asarray(y_values, dtype = np.float64)
+	x_values = np.broadcast_to(np.asarray(x_values, dtype = np.float64), \
+														y_values.shape)
+	used = np.isfinite(y_values) & np.isfinite(x_values)
+	if mask is not None:
+		used &= np.asarray(mask, dtype = bool)
+	n = used.sum(axis = -1)
+
+	with np.errstate(all = 'ignore'):
+		if shift is None:
+			# A row without any used points doesn't matter.
+			shift = (np.nan_to_num(np.where(used, x_values, 0.0).sum(axis = -1) / n), \
+						np.nan_to_num(np.where(used, y_values, 0.0).sum(axis = -1) / n))
+
+		dx = np.where(used, x_values - np.asarray(shift[0])[..., None], 0.0)
+		dy = np.where(used, y_values - np.asarray(shift[1])[..., None], 0.0)
+
+	sums = np.stack([n, dx.sum(axis = -1), dy.sum(axis = -1), (dx * dx).sum(axis = -1), \
+						(dx * dy).sum(axis = -1), (dy * dy).sum(axis = -1)])
+
+	return sums, shift
+
+
+# Does the actual fit for the sums (and the same < shift >) of 
+# linear_sums(), see fit_linear_functions().
+def fit_from_sums(sums, shift):
+	n, sum_x, sum_y, sum_xx, sum_xy, sum_yy = sums
+
+	with np.errstate(all = 'ignore'):
+		dx_mean = sum_x / n
+		dy_mean = sum_y / n
+		sxx = sum_xx - sum_x * dx_mean
+		sxy = sum_xy - sum_x * dy_mean
+		syy = sum_yy - sum_y * dy_mean
+
+		slope = sxy / sxx
+		x_mean = shift[0] + dx_mean
+		y_intercept = shift[1] + dy_mean - slope * x_mean
+
+		# The sum of the squared residuals. Can become slightly negative 
+		# due to rounding if the points are exactly on a line.
+		variance = np.maximum(syy - slope * sxy, 0.0) / (n - 2)
+		slope_error = np.sqrt(variance / sxx)
+		y_intercept_error = np.sqrt(variance * (1.0 / n + x_mean**2 / sxx))
+
+	return y_intercept, slope, y_intercept_error, slope_error
+
+
 
 
 
@@ -53,18 +53,217 @@ def create_table_header(new_data):
 
 
 
+# The activation energy, pre-factor and kinetic function are the same for a 
+# single prediction and for many, see batch_main(). These are attributes of 
+# < prediction >.
+def get_parameters(prediction, conversion_step, timestep):
+	print('\nRegarding the activation energy:')
+	activation_energy = cd.UserFunction(conversion_step, timestep)
+
+	prediction.activation_energy = activation_energy
+
+
+	text = 'Compensation parameter a = '
+	# Don't use dec()-numbers here, because these values are needed shortly 
+	# after in numpy functions.
+	a = float(af.get_user_input(text))
+
+	text = 'Compensation parameter b = '
+	b = float(af.get_user_input(text))
+
+
+	# I want the pre-factors also to be a UserFunctionobject. But the __init__ 
+	# of class UserFunction() can not handle to calculate the values from given 
+	# third values (which are not the conversion). I could write that, but it 
+	# doesn't seem worth it. Thus I simply deepcopy activation_energy, calculate
+	# the pre-factor values with calculate_pre_factor() and simply replace
+	# the value-attribute with the new list.
+	pre_factor = deepcopy(activation_energy)
+	new_values = kfc.calculate_pre_factor(a, b, activation_energy)
+	pre_factor.values = new_values
+
+	prediction.pre_factor = pre_factor
+
+
+	print('\n\nRegarding the kinetic function:')
+	kinetic_function = cd.UserFunction(conversion_step, timestep)
+
+	prediction.kinetic_function = kinetic_function
+
+
+
+# The temperature program is put together segment by segment, see class
+# TemperatureProgram().
+def get_temperature_program():
+	text = 'Start temperature in KELVIN: '
+	temperature_program = cd.TemperatureProgram(af.get_user_input(text))
+
+	this = '\nThe temperature program consists of segments, one after the other. '
+	that = 'A segment heats or cools to a given temperature (R) or holds the '
+	siht = 'temperature for some time (H).'
+	print(this + that + siht)
+
+	i = 1
+	while True:
+		this = 'Segment {}: ramp (R), hold (H) or done (D): '.format(i)
+		user_input = 'risimif'
+		while not af.correct_user_input(user_input, ['r', 'h', 'd']):
+			user_input = input(this)
+
+		if user_input.lower() == 'd':
+			if len(temperature_program.times) > 1:
+				break
+			print('ERROR: At least one segment is needed.\n')
+			continue
+
+		if user_input.lower() == 'r':
+			text = 'Temperature at the end of the segment in KELVIN: '
+			end_temperature = af.get_user_input(text)
+
+			# See main() why minutes are used here.
+			text = 'Temperature ramp in Kelvin per MINUTE (also positive for cooling): '
+			ramp = dec('0.0')
+			while ramp <= 0:
+				ramp = abs(af.get_user_input(text))
+
+			temperature_program.add_ramp(end_temperature, ramp / dec('60.0'))
+		else:
+			text = 'Duration of the hold in SECONDS: '
+			temperature_program.add_hold(af.get_user_input(text))
+
+		i += 1
+
+	return temperature_program
+
+
+
+# Each line of the scenario table (after the table header) is one scenario, 
+# with the columns separated by tabs:
+# name, start temperature (K), end temperature (K), ramp (K/min), 
+# timeframe (s), initial conversion (may be empty)
+# A ramp of zero means that the scenario is isothermal at the start 
+# temperature.
+def read_scenarios(infile, timestep, total_heat):
+	scenarios = []
+	names = []
+
+	with open(infile, 'r') as f:
+		# The table header.
+		f.readline()
+
+		for line in f:
+			if not line.strip():
+				continue
+
+			values = [x.strip().replace(',', '.') for x in line.split('\t')]
+			values += [''] * (6 - len(values))
+			name, start_temperature, end_temperature, ramp, timeframe, \
+											initial_conversion = values[:6]
+
+			start_temperature = dec(start_temperature)
+			ramp = dec(ramp) / dec('60.0')
+			isothermal = ramp == 0
+			if isothermal:
+				end_temperature = start_temperature
+			else:
+				end_temperature = dec(end_temperature)
+
+			# See main() why it can't be zero.
+			if not initial_conversion or dec(initial_conversion) == 0:
+				initial_conversion = dec('0.0000001')
+			else:
+				initial_conversion = dec(initial_conversion)
+
+			scenario = cd.Prediction(timestep, dec(timeframe), isothermal, \
+							start_temperature, end_temperature, ramp, total_heat, \
+							initial_conversion)
+			scenarios.append(scenario)
+			names.append(name)
+
+	return scenarios, names
+
+
+
+# Writes all scenarios into one file, one after the other, with the name of 
+# the scenario in the first column.
+def write_combined_file(outfile, scenarios, names):
+	with open(outfile, 'w', encoding='utf8') as f:
+		this = 'Scenario\tTime (s)\tTemperature (K)\tConversion\t'
+		that = 'Normalized Heat Flow (W/g)\n'
+		f.write(this + that)
+
+		for scenario, name in zip(scenarios, names):
+			for i in range(len(scenario.time)):
+				this = '{}\t{}\t{}\t{}\t{}\n'.format(name, scenario.time[i], \
+							scenario.temperature[i], scenario.conversion[i], \
+														scenario.heat_flow[i])
+				f.write(this)
+
+
+
+# Instead of one isothermal or ramp, many of these (scenarios) are predicted
+# at once, see class BatchPrediction().
+def batch_main():
+	this = 'Full path of folder with the scenario table (results will be '
+	that = 'stored there, too): '
+	path = af.get_path(this + that)
+
+	this = '\nATTENTION: The first line of the table is the table header. '
+	that = 'Each other line is one scenario with the following columns '
+	siht = 'separated by tabs: name, start temperature (K), end temperature '
+	taht = '(K), ramp (K/min, zero for an isothermal), timeframe (s), initial '
+	tihs = 'conversion (may be empty).\n'
+	print(this + that + siht + taht + tihs)
+	infile = af.get_infile(path, 'Name of the scenario table (incl. extension): ')
+
+	timestep = af.get_user_input('timestep')
+
+	text = 'Total heat of reaction (J/g): '
+	total_heat = af.get_user_input(text)
+
+	conversion_step = af.get_user_input('conversion_step')
+
+	scenarios, names = read_scenarios(infile, timestep, total_heat)
+
+	prediction = cd.BatchPrediction(scenarios)
+	get_parameters(prediction, conversion_step, timestep)
+
+	prediction.predict()
+
+	print('\nWriting to File ...')
+	if af.get_user_input('combined_file'):
+		outfile_name = af.get_user_input('outfile')
+		write_combined_file(path + outfile_name, scenarios, names)
+
+		this = 'The < {} > file with the predicted values was '.format(outfile_name)
+		that = 'created in the stated folder.\n'
+		print(this + that)
+	else:
+		for scenario, name in zip(scenarios, names):
+			order_of_variables = create_table_header(scenario)
+			af.write_to_file(path + name + '.txt', scenario, order_of_variables)
+
+		this = 'For each scenario a file < NAME.txt > with the predicted values '
+		that = 'was created in the stated folder.\n'
+		print(this + that)
+
+
+
 def main():
 	print("""\n\nPredicting DSC heat flow curves.\n
 Important: Use the exact (!) parameters for a given dataset -- total heat, compensation parameters (if it is a dynamic measurement), parameters of the kinetic function -- if you want to compare the measured DSC heat flow curves with predicted values. This may be seen as a measure how good the method is in figuring out the kinetic parameters from a given set of data.
 
 Use mean values for all these parameters, to make a more general prediction.
 
-ATTENTION: This program can EITHER predict isothermal heat flow OR the heat flow if a linear (!) temperature ramp is applied.
-If a general temperature program shall be predicted the program has to be called again, with changed parameters. E.g. a ramp followed by an isothermal would first simulate the ramp, starting with conversion = 0.0 and having at the end a conversion of 23 percent (for example). Afterwards, a second call of this program predicts the isothermal, taking the 23 percent as initial degree of cure.
+ATTENTION: This program can predict isothermal heat flow, the heat flow if a linear (!) temperature ramp is applied OR the heat flow for a temperature program which consists of several linear ramps (heating or cooling) and isothermal holds (e.g. a cure cycle).
 
 ATTENTION: This program assumes that all heat is transported away at once. This is just valid for small samples. The behaviour of large samples, which heat up during the curing process, can NOT be predicted with this simple tool!
 """)
 
+	if af.get_user_input('prediction_batch'):
+		batch_main()
+		return
+
 	path = af.get_path('Folder where the result shall be stored: ')
 	outfile_name = af.get_user_input('outfile')
 
@@ -81,10 +280,23 @@ ATTENTION: This program assumes that all heat is transported away at once. This
 	timeframe = af.get_user_input(text)
 
 
+	engine = af.get_user_input('prediction_engine')
+	keep_every = af.get_user_input('keep_every')
+
+
 	isothermal = af.get_user_input('prediction_mode')
+	temperature_program = None
+
 
+	if isothermal == 'program':
+		isothermal = False
+		temperature_program = get_temperature_program()
 
-	if not isothermal:
+		# These are not used with a temperature program.
+		start_temperature = dec(temperature_program.temperatures[0])
+		end_temperature = dec(temperature_program.temperatures[-1])
+		ramp = dec('0.0')
+	elif not isothermal:
 		text = 'Start temperature in KELVIN: '
 		start_temperature = af.get_user_input(text)
 
@@ -127,46 +339,15 @@ ATTENTION: This program assumes that all heat is transported away at once. This
 	# All else will be added manually below.
 	prediction = cd.Prediction(timestep, timeframe, isothermal, \
 					start_temperature, end_temperature, ramp, total_heat, \
-					initial_conversion)
-
-
-	print('\nRegarding the activation energy:')
-	activation_energy = cd.UserFunction(conversion_step, timestep)
-
-	prediction.activation_energy = activation_energy
-
-
-	text = 'Compensation parameter a = '
-	# Don't use dec()-numbers here, because these values are needed shortly 
-	# after in numpy functions.
-	a = float(af.get_user_input(text))
+					initial_conversion, temperature_program)
 
-	text = 'Compensation parameter b = '
-	b = float(af.get_user_input(text))
 
-
-	# I want the pre-factors also to be a UserFunctionobject. But the __init__ 
-	# of class UserFunction() can not handle to calculate the values from given 
-	# third values (which are not the conversion). I could write that, but it 
-	# doesn't seem worth it. Thus I simply deepcopy activation_energy, calculate
-	# the pre-factor values with calculate_pre_factor() and simply replace
-	# the value-attribute with the new list.
-	pre_factor = deepcopy(activation_energy)
-	new_values = kfc.calculate_pre_factor(a, b, activation_energy)
-	pre_factor.values = new_values
-
-	prediction.pre_factor = pre_factor
-
-
-	print('\n\nRegarding the kinetic function:')
-	kinetic_function = cd.UserFunction(conversion_step, timestep)
-
-	prediction.kinetic_function = kinetic_function
+	get_parameters(prediction, conversion_step, timestep)
 
 
 	# And finally the thing is happening what I actually wanted to happen.
 	# Hey look! It's a one liner ;)
-	prediction.predict()
+	prediction.predict(engine, keep_every)
 
 
 	order_of_variables = create_table_header(prediction)
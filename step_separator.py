@@ -35,6 +35,9 @@
 import os
 import additional_functions as af
 
+# So many lines of a step are collected before these are written into the file.
+BUFFER_SIZE = 10000
+
 ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## ## 
 ## ## ## ## ## ## ##                            ## ## ## ## ## ## ## 
 ## ## ## ## ## ## ## FUNCTION DEFINITIONS HERE  ## ## ## ## ## ## ##
@@ -43,17 +46,10 @@ import additional_functions as af
 
 
 # Each step gets its own file in the end.
-# Here I create the outfile names
-def create_filenames(path, steps):
-	filenames = []
-
-	# To not confuse the user I start counting the files at one.
-	for i in range(1, (len(steps) + 1)):
-		number = str(i).zfill(2)
-		description = steps[i - 1]
-		filenames.append('{}{}_{}.txt'.format(path, number, description))
-
-	return filenames
+# Here I create the outfile name for step number < number >.
+# To not confuse the user I start counting the files at one.
+def create_filename(path, number, description):
+	return '{}{}_{}.txt'.format(path, str(number).zfill(2), description)
 
 
 
@@ -91,74 +87,73 @@ def create_table_header(names_as_line, units_as_line):
 
 
 
-# This functions reads the infile and returns the information for the 
-# table-head header for each file, the names of each step and a list that 
-# contains lists with the data from each step.
+# This function reads the infile line by line and writes each line directly
+# into the file of the step it belongs to. Thus never more than a few lines 
+# are in the memory, no matter how large the infile is, and the file of a 
+# step is finished (closed) as soon as the next step starts.
+# It returns the names of all the files that were created.
 # I don't like that it does so much, but separating these functions would 
 # have meant to go through the file several times which I liked even less.
-def extract_data(infile):
-	all_data = []
-	steps = []
+def separate_steps(path, infile):
+	outfiles = []
+	outfile = None
 	step_data = []
 	table_header = None
-	collect_data = False
-	
-	skip_so_many = 3
 
 	with open(infile, 'r', encoding='utf-8', errors='ignore') as f:
-		for line in f:
-			# Before the data of the first step is a lot of text that
-			# shall be ignored. Thus all "collect data stuff" is 
-			# switched on at the first occurence of the keyword '[step]'.
-			if '[step]' in line and len(step_data) == 0:
-				collect_data = True
-
-				# After the keyword < [step] > some information follows 
-				# which is not the data.
-				steps.append(extract_stepname(f.readline()))
-				names_as_line = f.readline()
-				units_as_line = f.readline()
-				table_header = create_table_header(names_as_line, units_as_line)
-
-			# If the keyword step occurs a second (third, etc) time, the step 
-			# taken care of before is over. All the collected step_data
-			# shall be stored in all_data and the collection of the 
-			# step data for the next step shall be started.
-			elif '[step]' in line and len(step_data) > 0:
-				all_data.append(step_data)
-				step_data = []
-
-				steps.append(extract_stepname(f.readline()))
-				# I don't need to extract te table header again.
-				f.readline()
-				f.readline()
-
-			# collect_data is just to skip the first lines of the file. 
-			# As soon as the first step starts it is set to True.
-			# Thus the keyword < [step] > itself would be collected as data
-			# if I would not take care of it.
-			if collect_data and ('[step]' not in line):
-				# Don't strip the linebreak at the end of each line,
-				# because then I have to put it there again later when
-				# writing to the file.
-				step_data.append(line)
+		try:
+			for line in f:
+				# Before the data of the first step is a lot of text that
+				# shall be ignored. Everything before the first occurence of 
+				# the keyword '[step]' is skipped because outfile is None.
+				# At each occurence of the keyword the step taken care of 
+				# before is over and the file of the next step is started.
+				if '[step]' in line:
+					finish_step(outfile, step_data)
+					step_data = []
+
+					# After the keyword < [step] > some information follows 
+					# which is not the data.
+					stepname = extract_stepname(f.readline())
+					names_as_line = f.readline()
+					units_as_line = f.readline()
+					# I don't need to extract the table header again for
+					# all following steps.
+					if table_header == None:
+						table_header = create_table_header(names_as_line, units_as_line)
+
+					outfile_name = create_filename(path, len(outfiles) + 1, stepname)
+					outfiles.append(outfile_name)
+
+					outfile = open(outfile_name, 'w', encoding='utf-8', errors='ignore')
+					# The table header should NOT have a linebreak at the end.
+					outfile.write('{}\n'.format(table_header))
+
+				elif outfile:
+					# Don't strip the linebreak at the end of each line,
+					# because then I have to put it there again later when
+					# writing to the file.
+					step_data.append(line)
+
+					if len(step_data) >= BUFFER_SIZE:
+						outfile.writelines(step_data)
+						step_data = []
 
 		# The last step will NOT be finished with the keyword '[step]'.
-		# Thus I need to store it in all_data manually.
-		all_data.append(step_data)
+		# Thus I need to finish it manually. This is also done if anything
+		# goes wrong, so that no file is left open.
+		finally:
+			finish_step(outfile, step_data)
 
-	return all_data, steps, table_header
+	return outfiles
 
 
 
-# This function writes the data for each step into a single file.
-# step_data is a list.
-def write_step_data_into_file(outfile_name, table_header, step_data):
-	with open(outfile_name, 'w', encoding='utf-8', errors='ignore') as f:
-		# The table header should NOT have a linebreak at the end.
-		f.write('{}\n'.format(table_header))
-		for line in step_data:
-			f.write(line)
+# Writes what is left of the data of a step into its file and closes it.
+def finish_step(outfile, step_data):
+	if outfile:
+		outfile.writelines(step_data)
+		outfile.close()
 
 
 
@@ -221,14 +216,7 @@ TRIOS software. Other vendors probably structure their files differently.
 	infile = af.get_infile(path)
 
 
-	all_data, steps, table_header = extract_data(infile)
-
-
-	outfiles = create_filenames(path, steps)
-
-
-	for i in range(len(outfiles)):
-		write_step_data_into_file(outfiles[i], table_header, all_data[i])
+	outfiles = separate_steps(path, infile)
 
 
 	move_to_new_directory(path, infile, outfiles)
@@ -0,0 +1,86 @@
+# Checks that starting each conversion step from the previous results
+# finds the same minimum of the double sum as starting from the initial
+# guess with fewer calculations, and that the number of processes changes 
+# nothing (with continuation no processes are used at all).
+
+from types import SimpleNamespace
+import numpy as np
+import calculate_activation_energy as cae
+
+OPTIONS = {'engine':'closed_form', 'solver':'bfgs', \
+									'bounds':cae.ACTIVATION_ENERGY_BOUNDS}
+
+
+# Time and temperature steps (experiments x steps) of isothermal first order
+# experiments with an activation energy which rises with the conversion and
+# a little noise on the time.
+def isothermal_steps():
+	rng = np.random.default_rng(0)
+	conversion = np.linspace(0.0, 0.98, 50)
+	E = 72000.0 + 15000.0 * conversion
+	time_steps = []
+	temperature_steps = []
+	for temperature in [330.0, 340.0, 350.0, 360.0, 370.0]:
+		rate = 1e7 * np.exp(-E[1:] / (cae.R * temperature)) * (1.0 - conversion[1:])
+		time = np.r_[0.0, np.cumsum(np.diff(conversion) / rate)]
+		time[1:] *= 1.0 + 0.002 * rng.standard_normal(len(time) - 1)
+		time_steps.append(np.maximum.accumulate(time))
+		temperature_steps.append(np.full(len(time), temperature))
+
+	return conversion, np.array(time_steps), np.array(temperature_steps)
+
+
+def test_warm_start_is_as_good_as_cold_start():
+	conversion, time_steps, temperature_steps = isothermal_steps()
+	indices = list(range(1, len(conversion)))
+
+	cold = list(cae.sweep_outcomes(indices, time_steps, temperature_steps, \
+							80000.0, dict(OPTIONS, continuation = False)))
+	warm = list(cae.sweep_outcomes(indices, time_steps, temperature_steps, \
+							80000.0, dict(OPTIONS, continuation = True)))
+
+	# minimize() must not stop at the result of the previous step.
+	assert warm[1][3]
+	assert warm[1][0] != warm[0][0]
+	for (E_warm, warm_value, _, _), (E_cold, cold_value, _, _) in zip(warm, cold):
+		assert warm_value <= cold_value * (1.0 + 1e-8)
+		assert abs(E_warm - E_cold) < 10.0
+
+	# This is what it is done for.
+	assert sum(x[2] for x in warm) < sum(x[2] for x in cold)
+
+
+# The data of isothermal_steps() as it is passed to 
+# calculate_activation_energy().
+def all_data():
+	conversion, time_steps, temperature_steps = isothermal_steps()
+
+	return [SimpleNamespace(conversion_steps = list(conversion), \
+						time_steps = list(time_steps[i]), \
+						temperature_steps = list(temperature_steps[i])) \
+												for i in range(len(time_steps))]
+
+
+def test_parallel_is_identical_to_serial():
+	data = all_data()
+
+	serial = cae.calculate_activation_energy(data, 80000.0)
+	parallel = cae.calculate_activation_energy(data, 80000.0, workers = 2, \
+																chunksize = 5)
+
+	assert serial == parallel
+
+
+def test_continuation_ignores_workers(monkeypatch):
+	data = all_data()
+
+	serial = cae.calculate_activation_energy(data, 80000.0, continuation = True)
+
+	def no_processes(*args, **kwargs):
+		raise AssertionError('continuation must not use processes')
+
+	monkeypatch.setattr(cae, 'parallel_outcomes', no_processes)
+	with_workers = cae.calculate_activation_energy(data, 80000.0, workers = 2, \
+										chunksize = 5, continuation = True)
+
+	assert serial == with_workers
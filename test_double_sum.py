@@ -0,0 +1,32 @@
+# Checks that the double sum in O(n) gives the same as the original double
+# loop, for lists and for numpy-arrays.
+
+import numpy as np
+import calculate_activation_energy as cae
+
+
+def test_double_sum_matches_reference_for_arrays():
+	rng = np.random.default_rng(0)
+	for n in [1, 2, 6, 25]:
+		these_integrals = rng.uniform(1e-3, 1e3, n)
+
+		assert np.isclose(cae.calculate_double_sum(these_integrals), \
+					cae.calculate_double_sum_reference(these_integrals), \
+														rtol = 1e-12, atol = 1e-9)
+
+
+def test_double_sum_matches_reference_for_lists():
+	rng = np.random.default_rng(1)
+	for n in [1, 2, 6, 25]:
+		these_integrals = rng.uniform(1e-3, 1e3, n).tolist()
+
+		assert np.isclose(cae.calculate_double_sum(these_integrals), \
+					cae.calculate_double_sum_reference(these_integrals), \
+														rtol = 1e-12, atol = 1e-9)
+
+
+def test_equal_integrals_give_n_times_n_minus_one():
+	these_integrals = np.full(6, 0.5)
+
+	assert cae.calculate_double_sum_reference(these_integrals) == 30.0
+	assert cae.calculate_double_sum(these_integrals) == 30.0
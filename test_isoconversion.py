@@ -0,0 +1,56 @@
+# Checks that the interpolated isoconversional points are where the
+# conversion actually reaches the steps, also if the data is sampled so
+# coarsely that the conversion rises by several steps from one sample to the
+# next.
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+import class_definitions as cd
+
+
+# Returns a Data-instance with array storage for a first order conversion
+# 1 - exp(-t/600) which is sampled every < timestep > seconds.
+def coarse_data(timestep):
+	data = cd.Data.__new__(cd.Data)
+	data.storage = 'array'
+	data.time = np.arange(0.0, 6000.0, timestep)
+	data.temperature = 300.0 + 0.1 * data.time
+	data.conversion = 1.0 - np.exp(-data.time / 600.0)
+	data.conversion_step = 0.01
+
+	return data
+
+
+def test_linear_is_close_to_the_exact_crossing():
+	data = coarse_data(10.0)
+	data.find_values_for_isoconversion('linear')
+
+	steps = np.array(data.conversion_steps[1:])
+	exact = -600.0 * np.log(1.0 - steps)
+
+	assert len(steps) == 99
+	assert np.allclose(data.time_steps[1:], exact, atol = 0.05)
+
+
+def test_pchip_matches_scipy_with_several_steps_per_sample():
+	data = coarse_data(10.0)
+	data.find_values_for_isoconversion('pchip')
+
+	steps = np.array(data.conversion_steps[1:])
+	times = np.array(data.time_steps[1:])
+	temperatures = np.array(data.temperature_steps[1:])
+
+	# At the start the conversion rises by more than one step per sample.
+	assert np.any(np.diff(data.step_indices[1:]) == 0)
+
+	# In the first and last sample interval the local cubic falls back to
+	# linear, while scipy uses one-sided slopes.
+	inner = (data.step_indices[1:] > 1) & \
+						(data.step_indices[1:] < len(data.conversion) - 1)
+	scipy_time = PchipInterpolator(data.conversion, data.time)(steps)
+	scipy_temperature = PchipInterpolator(data.conversion, \
+														data.temperature)(steps)
+
+	assert np.allclose(times[inner], scipy_time[inner], rtol = 0, atol = 1e-9)
+	assert np.allclose(temperatures[inner], scipy_temperature[inner], \
+														rtol = 0, atol = 1e-9)
@@ -0,0 +1,46 @@
+# Checks that the data files are read into arrays with the same values as 
+# into lists of dec()-numbers, also if the file is read in chunks.
+
+from decimal import Decimal as dec
+import numpy as np
+import class_definitions as cd
+
+
+# Comma decimals, an extra column and empty cells during the first five 
+# minutes (become zero) and later on (get the value before them).
+def write_data(tmp_path):
+	infile = tmp_path / 'ramp.txt'
+	lines = ['Index\tTime (min)\tTemperature (C)\tNormalized Heat Flow (W/g)\t' + \
+													'Normalized Heat Capacity (J/gK)']
+	for i in range(50):
+		heat_capacity = '' if (i < 20 or 30 <= i < 34) else '1,{}'.format(i)
+		heat_flow = '' if i in [40, 41] else '0.{:03d}'.format(i * 7)
+		lines.append('{}\t{}\t{},5\t{}\t{}'.format(i, i / 60, 25 + i, heat_flow, \
+																heat_capacity))
+	infile.write_text('\n'.join(lines) + '\n\n', encoding = 'utf8')
+
+	return str(infile)
+
+
+def assert_same_values(data, reference):
+	assert data.variables == reference.variables
+	assert data.number_of_measurements == reference.number_of_measurements
+	for variable in reference.variables:
+		expected = [float(x) for x in getattr(reference, variable)]
+		assert getattr(data, variable).tolist() == expected
+
+
+def test_array_is_the_same_as_decimal(tmp_path):
+	infile = write_data(tmp_path)
+	reference = cd.Data(dec('10'), infile)
+
+	assert_same_values(cd.Data(dec('10'), infile, 'array'), reference)
+
+
+def test_chunks_are_the_same_as_decimal(tmp_path, monkeypatch):
+	infile = write_data(tmp_path)
+	reference = cd.Data(dec('10'), infile)
+	monkeypatch.setattr(cd, 'CHUNK_SIZE', 7)
+
+	assert_same_values(cd.Data(dec('10'), infile, 'array'), reference)
+	assert_same_values(cd.Data(dec('10'), infile, 'memmap'), reference)
@@ -0,0 +1,72 @@
+# Checks that the values from other files are found with np.searchsorted()
+# like with the loops which were used before.
+
+from decimal import Decimal as dec
+import numpy as np
+import class_definitions as cd
+
+
+# The loops from before, the first for 'next', the second for 'nearest'.
+def next_loop(reference_list, original_list, values_list):
+	new_values_list = []
+	j = 0
+	for i in range(len(original_list)):
+		if original_list[i] >= reference_list[j]:
+			new_values_list.append(values_list[i])
+			j += 1
+			if j == len(reference_list):
+				break
+
+	return new_values_list
+
+
+def nearest_loop(reference_list, original_list, values_list):
+	new_values_list = []
+	for this_value in reference_list:
+		this_index = min(range(len(original_list)), \
+							key = lambda i: abs(original_list[i] - this_value))
+		new_values_list.append(values_list[this_index])
+
+	return new_values_list
+
+
+def data():
+	this = cd.Data.__new__(cd.Data)
+	this.storage = 'array'
+
+	return this
+
+
+# A conversion with noise (it goes down now and then), which rises by much
+# less than the steps of the reference from one value to the next.
+def noisy_conversion():
+	rng = np.random.default_rng(0)
+	steps = rng.uniform(-0.0005, 0.001, 5000)
+	steps[0] = 0.0
+
+	return np.cumsum(steps)
+
+
+def test_next_is_the_same_as_the_loop():
+	conversion = noisy_conversion()
+	heat_flow = np.arange(len(conversion)) * 0.5
+	reference = [dec(i) / dec(100) for i in range(1, int(conversion.max() * 100))]
+
+	expected = next_loop([float(x) for x in reference], conversion.tolist(), \
+															heat_flow.tolist())
+
+	assert data()._original_longer_reference(reference, conversion, \
+												heat_flow) == expected
+	assert data()._original_longer_reference(reference, conversion.tolist(), \
+											heat_flow.tolist()) == expected
+
+
+def test_nearest_is_the_same_as_the_loop():
+	rng = np.random.default_rng(1)
+	# Unsorted and with equal values, the first one of these is used.
+	original = np.round(rng.uniform(0.0, 1.0, 300), 2).tolist()
+	values = [dec(i) for i in range(len(original))]
+	reference = np.linspace(-0.1, 1.1, 97).tolist()
+
+	assert data()._original_shorter_reference(reference, original, values) == \
+							nearest_loop(reference, original, values)
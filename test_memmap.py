@@ -0,0 +1,46 @@
+# Checks that the values which are calculated from memory-mapped data don't
+# stay on the disk next to the data.
+
+import os
+from decimal import Decimal as dec
+import class_definitions as cd
+
+
+def write_data(tmp_path):
+	infile = tmp_path / 'isothermal.txt'
+	lines = ['Time (min)\tTemperature (C)\tNormalized Heat Flow (W/g)']
+	lines += ['{}\t{}\t{}'.format(i / 10, 100 + i / 100, 1 / (i + 1)) for i in range(100)]
+	infile.write_text('\n'.join(lines) + '\n', encoding = 'utf8')
+
+	return str(infile)
+
+
+def derived_files(data):
+	return [x for x in os.listdir(data.cache_folder) if x.startswith('derived_')]
+
+
+def memmap_data(infile):
+	data = cd.Data(dec('0.1'), infile, 'memmap')
+	data.in_kelvin = 0
+	data.create_temperature_in_kelvin()
+
+	return data
+
+
+def test_derived_columns_are_removed(tmp_path):
+	data = memmap_data(write_data(tmp_path))
+
+	assert len(derived_files(data)) == 1
+	assert abs(data.temperature[0] - 373.15) < 1e-9
+
+	data.remove_derived_columns()
+
+	assert derived_files(data) == []
+
+
+def test_derived_columns_are_removed_with_the_instance(tmp_path):
+	data = memmap_data(write_data(tmp_path))
+	cache_folder = data.cache_folder
+	del data
+
+	assert [x for x in os.listdir(cache_folder) if x.startswith('derived_')] == []
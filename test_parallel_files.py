@@ -0,0 +1,82 @@
+# Checks that the programs which process each file on its own write exactly
+# the same files if the files are processed in parallel.
+
+import os
+from decimal import Decimal as dec
+from types import SimpleNamespace
+import numpy as np
+import additional_functions as af
+import class_definitions as cd
+import calculate_common_compensation_parameters as ccp
+import kinetic_function_calculation as kfc
+
+
+# Dynamic first order experiments with 1 s timestep and a total heat of 
+# 300 J/g, one file per ramp (in Kelvin per minute).
+def write_ramps(folder):
+	folder.mkdir()
+	for ramp in [5.0, 10.0, 20.0]:
+		time = np.arange(0.0, 60.0 * 300.0 / ramp)
+		temperature = 30.0 + ramp / 60.0 * time
+		rate = 1e8 * np.exp(-80000.0 / (8.314 * (temperature + 273.15)))
+		conversion = 1.0 - np.exp(-np.cumsum(rate))
+		heat_flow = 300.0 * rate * (1.0 - conversion)
+
+		lines = ['Time (min)\tTemperature (C)\tNormalized Heat Flow (W/g)']
+		lines += ['{}\t{}\t{}'.format(*x) for x in zip(time / 60.0, temperature, heat_flow)]
+		(folder / 'ramp_{}.txt'.format(ramp)).write_text('\n'.join(lines) + '\n', \
+															encoding = 'utf8')
+
+	return str(folder) + os.sep
+
+
+# The answers of the user. The files are read in the same order each time.
+def answer(monkeypatch, path, workers):
+	answers = {'timestep':dec('1'), 'kelvin':False, 'total_heat':dec('300'), \
+				'initial_conversion':None, 'workers':workers, \
+				'conversion_step':dec('0.01'), 'Compensation parameter a = ':dec('0.26'), \
+				'Compensation parameter b = ':dec('0.00029')}
+	monkeypatch.setattr(af, 'get_path', lambda *text: path)
+	monkeypatch.setattr(af, 'get_user_input', lambda text, *rest: answers[text])
+	monkeypatch.setattr(os, 'listdir', lambda folder, listdir = os.listdir: \
+														sorted(listdir(folder)))
+
+
+def written_files(path):
+	files = {}
+	for filename in os.listdir(path):
+		if os.path.isfile(path + filename):
+			with open(path + filename, encoding = 'utf8') as f:
+				files[filename] = f.read()
+
+	return files
+
+
+def test_compensation_parameters_in_parallel(tmp_path, monkeypatch):
+	results = []
+	for workers in [1, 2]:
+		path = write_ramps(tmp_path / str(workers))
+		answer(monkeypatch, path, workers)
+		ccp.main()
+		results.append(written_files(path))
+
+	assert '00000_compensation_parameters.txt' in results[0]
+	assert results[0] == results[1]
+
+
+def test_kinetic_function_in_parallel(tmp_path, monkeypatch):
+	# The activation energy is given directly instead of asking the user.
+	conversion = [dec(i) / dec(100) for i in range(1, 100)]
+	activation_energy = SimpleNamespace(conversion = conversion, \
+									values = [80000.0] * len(conversion))
+	monkeypatch.setattr(cd, 'UserFunction', lambda *arguments: activation_energy)
+
+	results = []
+	for workers in [1, 2]:
+		path = write_ramps(tmp_path / str(workers))
+		answer(monkeypatch, path, workers)
+		kfc.main()
+		results.append(written_files(path))
+
+	assert len([x for x in results[0] if x.startswith('000_actual')]) == 3
+	assert results[0] == results[1]
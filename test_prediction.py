@@ -0,0 +1,137 @@
+# Checks that the adaptive timesteps of Prediction.predict(engine = 'ode') 
+# yield what the fixed timesteps yield for a very small timestep, with far
+# less steps, also if the values are given as a long table (with steps 
+# between its values).
+
+import contextlib
+import io
+from types import SimpleNamespace
+import numpy as np
+import class_definitions as cd
+
+
+# An isothermal first order prediction with values for 1000 conversions and
+# an activation energy which rises with the conversion.
+def isothermal_prediction(timestep):
+	prediction = cd.Prediction(timestep, 600.0, True, 480.0, 480.0, 0.0, \
+																300.0, 0.0)
+	conversion = np.linspace(0.0, 1.0, 1000)
+	prediction.activation_energy = SimpleNamespace(conversion = conversion, \
+									values = 80000.0 + 10000.0 * conversion)
+	prediction.pre_factor = SimpleNamespace(conversion = conversion, \
+									values = np.full(len(conversion), 1e7))
+	prediction.kinetic_function = SimpleNamespace(conversion = conversion, \
+									values = 300.0 * (1.0 - conversion))
+
+	return prediction
+
+
+def predict(prediction, engine):
+	with contextlib.redirect_stdout(io.StringIO()):
+		prediction.predict(engine)
+
+	return prediction
+
+
+def test_ode_matches_small_timesteps_with_far_less_steps():
+	euler = predict(isothermal_prediction(0.01), 'euler')
+	ode = predict(isothermal_prediction(0.5), 'ode')
+
+	# A few steps for each of the 1000 values, independent of how long the
+	# prediction is.
+	assert ode.solver_steps < 5000
+	assert ode.solver_steps * 10 < len(euler.time)
+
+	# The difference is what the timestep of 0.01 s costs .predict().
+	conversion = np.interp(ode.time, euler.time, euler.conversion)
+	assert np.allclose(ode.conversion, conversion, rtol = 0, atol = 1e-4)
+	assert ode.conversion[-1] > 0.85
+
+
+# The loop of Prediction.predict() like it was, with lists which grow by one
+# value per timestep and a search in the tables in each timestep.
+def list_loop(prediction):
+	def look_up(table, conversion):
+		for i in range(len(table.conversion)):
+			if table.conversion[i] >= conversion:
+				return float(table.values[i])
+
+	R = 8.314
+	prediction.time = [0.0]
+	while not prediction.fully_cured():
+		temperature = prediction.temperature[-1]
+		conversion = prediction.conversion[-1]
+
+		activation_energy = look_up(prediction.activation_energy, conversion)
+		pre_factor = look_up(prediction.pre_factor, conversion)
+		kinetic_function = look_up(prediction.kinetic_function, conversion)
+
+		heat_flow = pre_factor * np.exp(-activation_energy / R / temperature) * \
+															kinetic_function
+		prediction.heat_flow.append(heat_flow)
+		prediction.conversion.append(conversion + heat_flow / \
+									prediction.total_heat * prediction.timestep)
+		prediction.temperature.append(temperature + prediction.ramp * prediction.timestep)
+		prediction.time.append(prediction.time[-1] + prediction.timestep)
+
+	return prediction
+
+
+def ramp_prediction(timestep, ramp = 0.05):
+	prediction = isothermal_prediction(timestep)
+	prediction.isothermal = False
+	prediction.start_temperature = 420.0
+	prediction.temperature = [420.0]
+	prediction.end_temperature = 470.0
+	prediction.ramp = ramp
+
+	return prediction
+
+
+def columns(prediction):
+	return [np.asarray(x, dtype = np.float64) for x in [prediction.time, \
+			prediction.temperature, prediction.conversion, prediction.heat_flow]]
+
+
+def test_buffer_is_the_same_as_the_lists(monkeypatch):
+	# The buffer has to grow several times.
+	monkeypatch.setattr(cd, 'BUFFER_SIZE', 100)
+	for make in [isothermal_prediction, ramp_prediction]:
+		expected = columns(list_loop(make(0.5)))
+		result = columns(predict(make(0.5), 'euler'))
+
+		for this, that in zip(result, expected):
+			assert np.array_equal(this, that)
+
+
+def test_keep_every_keeps_every_nth_and_the_last_timestep():
+	everything = columns(predict(ramp_prediction(0.5), 'euler'))
+	prediction = ramp_prediction(0.5)
+	with contextlib.redirect_stdout(io.StringIO()):
+		prediction.predict('euler', keep_every = 7)
+
+	for this, that in zip(columns(prediction), everything):
+		# Otherwise the last timestep would be kept anyway.
+		assert len(that) % 7 != 1
+		assert np.array_equal(this, np.r_[that[::7], that[-1]])
+
+
+def test_batch_is_the_same_as_one_at_a_time():
+	scenarios = [isothermal_prediction(0.5), ramp_prediction(0.5), \
+											ramp_prediction(0.5, ramp = 0.2)]
+	scenarios[0].initial_conversion = 0.1
+	scenarios[0].conversion = [0.1]
+
+	batch = cd.BatchPrediction([cd.Prediction(0.5, x.timeframe, x.isothermal, \
+						x.start_temperature, x.end_temperature, x.ramp, x.total_heat, \
+								x.initial_conversion) for x in scenarios])
+	batch.activation_energy = scenarios[0].activation_energy
+	batch.pre_factor = scenarios[0].pre_factor
+	batch.kinetic_function = scenarios[0].kinetic_function
+	with contextlib.redirect_stdout(io.StringIO()):
+		batch.predict()
+
+	for scenario, result in zip(scenarios, batch.scenarios):
+		expected = columns(predict(scenario, 'euler'))
+		for this, that in zip(columns(result), expected):
+			assert np.array_equal(this, that)
@@ -0,0 +1,22 @@
+# Checks that the bounded solver finds the same minimum of the double sum as
+# minimize() does, starting from the initial guess.
+
+import calculate_activation_energy as cae
+from test_continuation import isothermal_steps
+
+
+def test_bounded_is_the_same_as_bfgs():
+	conversion, time_steps, temperature_steps = isothermal_steps()
+	indices = list(range(1, len(conversion)))
+	options = {'engine':'closed_form', 'continuation':False, \
+									'bounds':cae.ACTIVATION_ENERGY_BOUNDS}
+
+	bfgs = list(cae.sweep_outcomes(indices, time_steps, temperature_steps, \
+							80000.0, dict(options, solver = 'bfgs')))
+	bounded = list(cae.sweep_outcomes(indices, time_steps, temperature_steps, \
+							80000.0, dict(options, solver = 'bounded')))
+
+	for (E_bounded, bounded_value, _, _), (E_bfgs, bfgs_value, _, _) in \
+														zip(bounded, bfgs):
+		assert bounded_value <= bfgs_value * (1.0 + 1e-8)
+		assert abs(E_bounded - E_bfgs) < 5.0
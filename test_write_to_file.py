@@ -0,0 +1,33 @@
+# Checks that data in array storage is written like the dec()-numbers were.
+
+from types import SimpleNamespace
+import numpy as np
+import additional_functions as af
+
+
+def test_floats_are_written_without_exponent(tmp_path):
+	data = SimpleNamespace(storage = 'array', table_header = 'time\tconversion\n', \
+				time = np.array([1.0, 2.0, 3.0]), \
+				conversion = np.array([6.390717350214516e-05, 0.0192611, np.nan]))
+	outfile = str(tmp_path / 'out.txt')
+
+	af.write_to_file(outfile, data, ['time', 'conversion'])
+
+	with open(outfile, encoding = 'utf8') as f:
+		lines = f.read().splitlines()
+
+	assert lines == ['time\tconversion', '1\t0.0000639071735021452', \
+													'2\t0.0192611', '3\t-']
+
+
+def test_no_noise_from_float_arithmetic(tmp_path):
+	data = SimpleNamespace(storage = 'array', table_header = 'temperature\n', \
+						temperature = np.array([72.6917, 0.1]) + 273.15)
+	outfile = str(tmp_path / 'out.txt')
+
+	af.write_to_file(outfile, data, ['temperature'])
+
+	with open(outfile, encoding = 'utf8') as f:
+		lines = f.read().splitlines()
+
+	assert lines == ['temperature', '345.8417', '273.25']